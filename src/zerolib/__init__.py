@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from . import command, logging, serialize, util
+from . import command, compress, logging, serialize, store, util
 from .context import Context
-from .dic import Dic
+from .dic import Dic, DicPath, FrozenDic, LazyDic
 from .exc import CircularError
 from .graph import Graph
 from .loguru_compat import log
 from .type import (
+    CompactStruct,
     FrozenNode,
     FrozenStruct,
     Node,
@@ -22,18 +23,24 @@ del log
 
 __all__ = (
     "CircularError",
+    "CompactStruct",
     "Context",
     "Dic",
+    "DicPath",
+    "FrozenDic",
     "FrozenNode",
     "FrozenStruct",
     "Graph",
+    "LazyDic",
     "Node",
     "Struct",
     "command",
+    "compress",
     "field",
     "logging",
     "register_ext_type",
     "serialize",
+    "store",
     "union",
     "util",
 )
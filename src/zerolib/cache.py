@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by entry count and approximate bytes
+
+    Size in bytes is supplied by the caller on `put`
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 << 20) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__} entries={len(self)} bytes={self.nbytes}"
+            f" hits={self.hits} misses={self.misses} evictions={self.evictions}>"
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, nbytes: int = 0) -> None:
+        self.pop(key)
+        # skip a value that would evict everything and still not fit
+        if nbytes <= self.max_bytes:
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value, nbytes = self._entries.pop(key)
+        except KeyError:
+            return default
+        self.nbytes -= nbytes
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
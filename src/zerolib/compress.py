@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import lzma
+import zlib
+from collections.abc import Iterable
+from typing import Any, Literal, cast
+
+import msgspec
+
+try:
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - python < 3.14
+    zstd = None
+
+from .store import BufferType
+
+# compressed records start with the msgpack "never used" byte so cannot be confused
+# with an uncompressed record, followed by a byte for the codec
+MAGIC = 0xC1
+
+# codec byte flag for a record compressed with a dictionary
+DICT_FLAG = 0x80
+
+CODECS = {"zlib": 1, "lzma": 2, "zstd": 3}
+
+_CODEC_NAMES = {v: k for k, v in CODECS.items()}
+
+CodecType = Literal["zlib", "lzma", "zstd"]
+
+# the largest window zlib can make use of
+ZLIB_DICT_SIZE = 32 << 10
+
+
+class Compression(msgspec.Struct, frozen=True):
+    """
+    Compression of stored records
+
+    `zdict` is a dictionary of content common to small records, see `train`;
+    records compressed with a dictionary can only be read with the same one
+    """
+
+    codec: CodecType = "zlib"
+    level: int | None = None
+    zdict: bytes | None = None
+
+    def __post_init__(self) -> None:
+        if self.codec == "zstd" and zstd is None:  # pragma: no cover - python < 3.14
+            raise ValueError(f"{self.codec} requires python >= 3.14")
+        if self.codec == "lzma" and self.zdict is not None:
+            raise ValueError(f"{self.codec} does not support a dictionary")
+
+    def compress(self, data: BufferType) -> bytes:
+        codec = CODECS[self.codec] | (DICT_FLAG if self.zdict is not None else 0)
+        return bytes((MAGIC, codec)) + self._compress(data)
+
+    def _compress(self, data: BufferType) -> bytes:
+        level: Any = self.level
+        match self.codec:
+            case "zlib":
+                compressor = zlib.compressobj(
+                    -1 if level is None else level, **_zlib_kwargs(self.zdict)
+                )
+                return compressor.compress(data) + compressor.flush()
+            case "lzma":
+                return lzma.compress(data, preset=level)
+        return cast(  # pragma: no cover - python >= 3.14
+            bytes, zstd.compress(data, level=level, zstd_dict=self._zstd_dict)
+        )
+
+    @property
+    def _zstd_dict(self) -> Any:  # pragma: no cover - python >= 3.14
+        return None if self.zdict is None else zstd.ZstdDict(self.zdict)
+
+    def decompress(self, data: BufferType) -> BufferType:
+        """Decompress record, an uncompressed record is returned as is"""
+        return decompress(data, self.zdict)
+
+    def train(
+        self, samples: Iterable[bytes], size: int = ZLIB_DICT_SIZE
+    ) -> Compression:
+        """Copy of self with a dictionary of up to `size` bytes trained on samples"""
+        samples = list(samples)
+        match self.codec:
+            case "zlib":
+                # zlib matches against the end of the dictionary first so the most
+                # recent samples go last
+                zdict = b"".join(samples)[-min(size, ZLIB_DICT_SIZE) :]
+            case "zstd":  # pragma: no cover - python >= 3.14
+                zdict = zstd.train_dict(samples, size).dict_content
+            case _:
+                raise ValueError(f"{self.codec} does not support a dictionary")
+        return msgspec.structs.replace(self, zdict=zdict)
+
+
+def decompress(data: BufferType, zdict: bytes | None = None) -> BufferType:
+    """Decompress record, an uncompressed record is returned as is"""
+    # XXX: coverage branch broken: data is uncompressed in
+    # ../../tests/unit/test_compress.py::test_uncompressed
+    if not data or data[0] != MAGIC:  # pragma: no branch
+        return data
+    codec, payload = data[1], data[2:]
+    if codec & DICT_FLAG and zdict is None:
+        raise ValueError(f"codec {codec:#x}: record is compressed with a dictionary")
+    match _CODEC_NAMES.get(codec & ~DICT_FLAG):
+        case "zlib":
+            decompressor = zlib.decompressobj(**_zlib_kwargs(zdict))
+            return decompressor.decompress(payload) + decompressor.flush()
+        case "lzma":
+            return lzma.decompress(payload)
+        case "zstd":  # pragma: no cover - python >= 3.14
+            return cast(
+                bytes,
+                zstd.decompress(
+                    payload, zstd_dict=None if zdict is None else zstd.ZstdDict(zdict)
+                ),
+            )
+    raise ValueError(f"unknown codec {codec:#x}")
+
+
+def _zlib_kwargs(zdict: bytes | None) -> dict[str, Any]:
+    # zlib does not accept zdict=None
+    return {} if zdict is None else {"zdict": zdict}
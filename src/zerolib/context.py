@@ -10,7 +10,9 @@ import appdirs
 from contextvars_extras import ContextVarDescriptor
 
 from . import const
+from .cache import LRUCache
 from .graph import Graph
+from .store import FileStore
 
 
 class Context:
@@ -26,11 +28,32 @@ class Context:
     cache = ContextVarDescriptor(default=True)
     """Whether to cache"""
 
+    memcache = ContextVarDescriptor(default=False)
+    """Whether to cache encoded Structs in memory, requires `cache`"""
+
+    lru = ContextVarDescriptor(default=LRUCache())
+    """
+    In-memory cache of encoded Structs, keyed by db path
+
+    The cache holds uncompressed bytes rather than instances, so a hit skips the
+    store read but still decodes: mutating an instance returned by `Struct.get` does
+    not change the cache, which is shared by every context using the default
+    """
+
     cachedir = ContextVarDescriptor(
         default=anyio.Path(appdirs.user_cache_dir(const.NAME))
     )
     """Cache directory"""
 
+    store = ContextVarDescriptor(default=FileStore())
+    """Storage backend for Struct"""
+
+    compression = ContextVarDescriptor(default=None)
+    """Compression of stored Structs, None to store uncompressed"""
+
+    concurrency = ContextVarDescriptor(default=32)
+    """Concurrency limit for batched store operations"""
+
     def __repr__(self) -> str:
         return f"<{type(self).__name__}>"
 
@@ -26,7 +26,7 @@ async def configure(
     enable_for: tuple[str, ...] = (__package__,),
 ) -> Logger:
     # read config
-    cfg = Dic(serialize.loads(await config.read_text()))
+    cfg = Dic(await serialize.load_async(config))
 
     default = cfg.logger.handlers[0]
     default.update(
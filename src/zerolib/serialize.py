@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import codecs
 import functools
 import io
 import json
+import os
+import re
 import sys
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator
+from json.decoder import WHITESPACE as _JSON_WHITESPACE  # type: ignore[attr-defined]
 from typing import IO, Any, Literal, cast, overload
 
+import anyio
+import anyio.to_process
 import msgpack
+import msgspec
 import yaml
 
-from .dic import Dic
+from .dic import Dic, LazyDic
 
 IOType = IO[Any] | io.BytesIO | io.StringIO
 
@@ -71,32 +78,164 @@ DEFAULT_SERIALIZER = SERIALIZERS[-1]
 FormatType = Literal[*SERIALIZERS]  # type: ignore[valid-type]
 
 
+def _msgspec_json_dumps(obj: Any, indent: int = 2, **kwargs: Any) -> str:
+    encoded = msgspec.json.encode(obj, enc_hook=str, **kwargs)
+    return msgspec.json.format(encoded, indent=indent).decode()
+
+
+def _msgspec_yaml_dumps(obj: Any, **kwargs: Any) -> str:
+    return msgspec.yaml.encode(obj, enc_hook=str, **kwargs).decode()
+
+
+def _file_dump(dumps: Callable[..., bytes | str]) -> Callable[..., None]:
+    def dump(obj: Any, file: IO[Any], **kwargs: Any) -> None:
+        file.write(dumps(obj, **kwargs))
+
+    return dump
+
+
+def _file_load(loads: Callable[..., Any]) -> Callable[..., Any]:
+    return lambda file, **kwargs: loads(file.read(), **kwargs)
+
+
+# msgspec equivalents of SERIALIZE: same output other than non-ascii characters, which
+# are written as is rather than escaped
+MSGSPEC_SERIALIZE = Dic(
+    msgpack=Dic(
+        dump=dict(
+            file=_file_dump(msgspec.msgpack.encode),
+            str=msgspec.msgpack.encode,
+        ),
+        load=dict(
+            file=_file_load(msgspec.msgpack.decode),
+            str=msgspec.msgpack.decode,
+        ),
+    ),
+    json=Dic(
+        dump=dict(
+            file=_file_dump(_msgspec_json_dumps),
+            str=_msgspec_json_dumps,
+        ),
+        load=dict(
+            file=_file_load(msgspec.json.decode),
+            str=msgspec.json.decode,
+        ),
+    ),
+    yaml=Dic(
+        dump=dict(
+            file=_file_dump(_msgspec_yaml_dumps),
+            str=_msgspec_yaml_dumps,
+        ),
+        load=dict(
+            file=_file_load(msgspec.yaml.decode),
+            str=msgspec.yaml.decode,
+        ),
+    ),
+)
+
+ENGINES = Dic(std=SERIALIZE, msgspec=MSGSPEC_SERIALIZE)
+
+ENGINE_CHOICES = tuple(ENGINES.keys())
+
+ENGINE_DEFAULT = ENGINE_CHOICES[0]
+
+EngineType = Literal[*ENGINE_CHOICES]  # type: ignore[valid-type]
+
+
 def dump(
     obj: Any,
     file: IOType = sys.stdout,
     fmt: FormatType = DEFAULT_SERIALIZER,
+    engine: EngineType = ENGINE_DEFAULT,
     **kwargs: Any,
 ) -> None:
     if fmt == "msgpack" and hasattr(file, "buffer"):
         # msgpack writes bytes so needs a buffer
         file = file.buffer
-    _dump(obj, SERIALIZE[fmt].dump.file, file, **kwargs)
+    if isinstance(obj, msgspec.Struct):
+        cast(IO[Any], file).write(_dump_struct(obj, fmt, engine, **kwargs))
+    else:
+        _dump(obj, ENGINES[engine][fmt].dump.file, file, **kwargs)
 
 
 @overload
-def dumps(obj: Any) -> str: ...
+def dumps(obj: Any, *, engine: EngineType = ..., **kwargs: Any) -> str: ...
 
 
 @overload
-def dumps(obj: Any, fmt: Literal["json", "yaml"]) -> str: ...
+def dumps(
+    obj: Any,
+    fmt: Literal["json", "yaml"],
+    *,
+    engine: EngineType = ...,
+    **kwargs: Any,
+) -> str: ...
 
 
 @overload
-def dumps(obj: Any, fmt: Literal["msgpack"]) -> bytes: ...
+def dumps(
+    obj: Any, fmt: Literal["msgpack"], *, engine: EngineType = ..., **kwargs: Any
+) -> bytes: ...
 
 
-def dumps(obj: Any, fmt: FormatType = DEFAULT_SERIALIZER, **kwargs: Any) -> bytes | str:
-    return cast(bytes | str, _dump(obj, SERIALIZE[fmt].dump.str, **kwargs)).strip()
+def dumps(
+    obj: Any,
+    fmt: FormatType = DEFAULT_SERIALIZER,
+    engine: EngineType = ENGINE_DEFAULT,
+    **kwargs: Any,
+) -> bytes | str:
+    dumped = (
+        _dump_struct(obj, fmt, engine, **kwargs)
+        if isinstance(obj, msgspec.Struct)
+        else cast(bytes | str, _dump(obj, ENGINES[engine][fmt].dump.str, **kwargs))
+    )
+    # whitespace is significant in msgpack
+    return dumped.strip() if isinstance(dumped, str) else dumped
+
+
+# order of sets and dicts in a dumped struct, so that equal structs dump the same
+# whatever the hash seed or insertion order
+STRUCT_DUMP_ORDER: Literal["deterministic"] = "deterministic"
+
+
+def _dump_struct(
+    obj: msgspec.Struct,
+    fmt: FormatType,
+    engine: EngineType,
+    *,
+    stringify: bool = True,
+    **kwargs: Any,
+) -> bytes | str:
+    """
+    Encode struct in one pass, rather than by way of `asdict` and `Dic.export`
+
+    The msgspec engine encodes the struct, the std engine dumps it converted to
+    builtins by msgspec: either way honouring `omit_defaults` and the type tag, with
+    other types as `str`, and sets and dicts in `STRUCT_DUMP_ORDER`. A zerolib
+    `Struct` is encoded to msgpack by itself, with its ext types, as both engines
+    write the same msgpack. With `stringify=False` it is dumped by way of `asdict`
+    and `Dic.export` instead.
+    """
+    # XXX: coverage branch broken: both in
+    # ../../tests/unit/test_serialize.py::test_dump_struct_options
+    if not stringify:  # pragma: no branch
+        return cast(
+            bytes | str,
+            _dump(obj, ENGINES[engine][fmt].dump.str, stringify=False, **kwargs),
+        )
+    encode = getattr(obj, "encode", None)
+    # XXX: coverage branch broken: both in
+    # ../../tests/unit/test_serialize.py::test_dump_struct_options
+    if fmt == "msgpack" and encode is not None and not kwargs:  # pragma: no branch
+        return cast(bytes, encode(fmt))
+    return cast(
+        bytes | str,
+        ENGINES[engine][fmt].dump.str(obj, order=STRUCT_DUMP_ORDER, **kwargs)
+        if engine == "msgspec"
+        else ENGINES[engine][fmt].dump.str(
+            msgspec.to_builtins(obj, enc_hook=str, order=STRUCT_DUMP_ORDER), **kwargs
+        ),
+    )
 
 
 def _dump(
@@ -116,16 +255,183 @@ def _dump(
 
 
 def load(
-    file: IOType = sys.stdin, fmt: FormatType = DEFAULT_SERIALIZER, **kwargs: Any
+    file: IOType = sys.stdin,
+    fmt: FormatType = DEFAULT_SERIALIZER,
+    engine: EngineType = ENGINE_DEFAULT,
+    *,
+    lazy: bool = False,
+    **kwargs: Any,
 ) -> Any:
-    return _load(SERIALIZE[fmt].load.file(file, **kwargs))
+    """Load from file, a dict as `Dic`, or with `lazy` as `LazyDic`"""
+    return _load(ENGINES[engine][fmt].load.file(file, **kwargs), lazy=lazy)
 
 
 def loads(
-    value: bytes | str, fmt: FormatType = DEFAULT_SERIALIZER, **kwargs: Any
+    value: bytes | str,
+    fmt: FormatType = DEFAULT_SERIALIZER,
+    engine: EngineType = ENGINE_DEFAULT,
+    *,
+    lazy: bool = False,
+    **kwargs: Any,
 ) -> Any:
-    return _load(SERIALIZE[fmt].load.str(value, **kwargs))
+    """Load from value, a dict as `Dic`, or with `lazy` as `LazyDic`"""
+    return _load(ENGINES[engine][fmt].load.str(value, **kwargs), lazy=lazy)
+
+
+def _load(obj: Any, *, lazy: bool = False) -> Any:
+    return (LazyDic if lazy else Dic)(obj) if isinstance(obj, dict) else obj
+
+
+# payloads of this size and above are decoded in a worker thread
+ASYNC_THREAD_THRESHOLD = 64 << 10
+
+# yaml payloads of this size and above are decoded in a worker process since the
+# parser holds the GIL for much of its work
+ASYNC_PROCESS_THRESHOLD = 16 << 20
 
 
-def _load(obj: Any) -> Any:
-    return Dic(obj) if isinstance(obj, dict) else obj
+async def load_async(
+    path: str | os.PathLike[str],
+    fmt: FormatType = DEFAULT_SERIALIZER,
+    engine: EngineType = ENGINE_DEFAULT,
+    **kwargs: Any,
+) -> Any:
+    """
+    `load` from path without blocking the event loop
+
+    Decoding is run in place, in a worker thread, or in a worker process depending
+    on size and format, see `ASYNC_THREAD_THRESHOLD` and `ASYNC_PROCESS_THRESHOLD`
+    """
+    data = await anyio.Path(path).read_bytes()
+    func = functools.partial(loads, data, fmt, engine, **kwargs)
+    if len(data) < ASYNC_THREAD_THRESHOLD:
+        return func()
+    if fmt == "yaml" and len(data) >= ASYNC_PROCESS_THRESHOLD:
+        return await anyio.to_process.run_sync(func)
+    return await anyio.to_thread.run_sync(func)
+
+
+async def dump_async(
+    obj: Any,
+    path: str | os.PathLike[str],
+    fmt: FormatType = DEFAULT_SERIALIZER,
+    engine: EngineType = ENGINE_DEFAULT,
+    **kwargs: Any,
+) -> None:
+    """
+    `dump` to path without blocking the event loop
+
+    Encoding is run in a worker thread since the size is not known in advance
+    """
+    func = (
+        functools.partial(_dump_struct, obj, fmt, engine, **kwargs)
+        if isinstance(obj, msgspec.Struct)
+        else functools.partial(_dump, obj, ENGINES[engine][fmt].dump.str, **kwargs)
+    )
+    data = cast(bytes | str, await anyio.to_thread.run_sync(func))
+    await anyio.Path(path).write_bytes(
+        data if isinstance(data, bytes) else data.encode()
+    )
+
+
+# characters read at a time by `iterload` of json, grown to fit large items
+ITERLOAD_READ_SIZE = 64 << 10
+
+# end of a json token, a syntax error before one is not cured by reading more
+_JSON_TOKEN_END = re.compile(r"[\s,:\[\]{}]")
+
+
+def iterload(
+    file: IOType = sys.stdin, fmt: FormatType = DEFAULT_SERIALIZER
+) -> Iterator[Any]:
+    """
+    Load top-level items one at a time, reading file incrementally
+
+    Items are json array elements, or values of concatenated or newline-delimited
+    json, yaml documents, and msgpack objects
+    """
+    # XXX: coverage branch broken: all formats in
+    # ../../tests/unit/test_serialize.py::test_iterload
+    match fmt:  # pragma: no branch
+        case "json":  # pragma: no branch
+            items: Iterable[Any] = _JsonItems(file)
+        case "msgpack":  # pragma: no branch
+            items = msgpack.Unpacker(file)  # type: ignore[attr-defined]
+        case _:
+            items = yaml.load_all(file, Loader=yaml.CLoader)
+    return map(_load, items)
+
+
+class _JsonItems:
+    def __init__(self, file: IOType) -> None:
+        self._read = file.read
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._peek() != "[":
+            while self._peek() is not None:
+                yield self._value()
+            return
+        self._pos += 1
+        if self._peek() == "]":
+            self._pos += 1
+        else:
+            while True:
+                yield self._value()
+                char = self._peek()
+                self._pos += 1
+                if char == "]":
+                    break
+                if char != ",":
+                    raise self._error(f"expecting ',' or ']' not {char!r}")
+        if (char := self._peek()) is not None:
+            raise self._error(f"extra data from {char!r}")
+
+    def _peek(self) -> str | None:
+        """Next non-whitespace character, None at end of file"""
+        while True:
+            self._pos = _JSON_WHITESPACE.match(self._buffer, self._pos).end()
+            # XXX: coverage branch broken: whitespace at end of buffer in
+            # ../../tests/unit/test_serialize.py::test_iterload
+            if self._pos < len(self._buffer):  # pragma: no branch
+                return self._buffer[self._pos]
+            # XXX: coverage branch broken: end of file in
+            # ../../tests/unit/test_serialize.py::test_iterload_json_empty
+            if not self._fill():  # pragma: no branch
+                return None
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as exc:
+                # only a string or the last token in the buffer may be cut short
+                if (
+                    not exc.msg.startswith("Unterminated string")
+                    and _JSON_TOKEN_END.search(self._buffer, exc.pos)
+                ) or not self._fill():
+                    raise
+                continue
+            # a value at the end of the buffer, such as a number, may continue
+            if end < len(self._buffer) or not self._fill():
+                self._pos = end
+                return value
+
+    def _fill(self) -> bool:
+        """Read more of file, returning False at end of file"""
+        chunk = self._read(max(ITERLOAD_READ_SIZE, len(self._buffer) - self._pos))
+        text = (
+            self._utf8.decode(chunk, final=not chunk)
+            if isinstance(chunk, bytes)
+            else chunk
+        )
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+        return bool(chunk)
+
+    def _error(self, msg: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(msg, self._buffer, self._pos)
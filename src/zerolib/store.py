@@ -0,0 +1,760 @@
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import pathlib
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections.abc import AsyncGenerator
+from typing import Literal, cast
+
+import anyio
+import msgspec
+
+BufferType = bytes | memoryview
+
+EVICT_CHOICES = ("lru", "ttl")
+
+EVICT_DEFAULT = EVICT_CHOICES[0]
+
+EvictType = Literal[*EVICT_CHOICES]  # type: ignore[valid-type]
+
+
+class RecordStat(msgspec.Struct, frozen=True):
+    name: str
+    size: int
+    atime: float
+    """Last access, as recorded by `Store.touch`"""
+    mtime: float
+    """Last write"""
+
+
+class GCStats(msgspec.Struct):
+    names: list[str] = msgspec.field(default_factory=list)
+    """Names of the evicted records"""
+    nbytes: int = 0
+    """Bytes freed"""
+
+    @property
+    def entries(self) -> int:
+        return len(self.names)
+
+
+class Store:
+    """
+    Struct storage backend
+
+    Records are addressed by path - `Struct.db_path` yields
+    `<cachedir>/db/<class>/<key>.msgpack` - and each backend maps that onto its own
+    layout
+    """
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}>"
+
+    async def read(self, path: anyio.Path) -> BufferType | None:
+        """Read record at path, None if there is no record"""
+        raise NotImplementedError  # pragma: no cover - abstract method
+
+    async def write(self, path: anyio.Path, data: BufferType) -> None:
+        """
+        Write record at path, replacing any existing record
+
+        data may be a view of a buffer that is reused once write returns, so is
+        written or copied before then and never held on to
+        """
+        raise NotImplementedError  # pragma: no cover - abstract method
+
+    async def delete(self, path: anyio.Path) -> None:
+        """Delete record at path, raises `FileNotFoundError` if there is no record"""
+        raise NotImplementedError  # pragma: no cover - abstract method
+
+    async def exists(self, path: anyio.Path) -> bool:
+        """Whether there is a record at path"""
+        raise NotImplementedError  # pragma: no cover - abstract method
+
+    async def keys(self, dirpath: anyio.Path) -> list[str]:
+        """Names of the records in directory"""
+        raise NotImplementedError  # pragma: no cover - abstract method
+
+    async def stat(self, dirpath: anyio.Path) -> list[RecordStat]:
+        """Size and times of the records in directory"""
+        raise NotImplementedError  # pragma: no cover - abstract method
+
+    async def touch(self, path: anyio.Path) -> None:
+        """Record access to record at path"""
+        raise NotImplementedError  # pragma: no cover - abstract method
+
+    async def gc(
+        self,
+        dirpath: anyio.Path,
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+        evict: EvictType = EVICT_DEFAULT,
+    ) -> GCStats:
+        """
+        Evict records in directory older than `max_age` seconds, then oldest first
+        until the directory holds at most `max_bytes`
+
+        Age is from last access with `evict="lru"`, last write with `evict="ttl"`.
+        What interrupted writes left in the directory is removed too, see `_gc_tmp`.
+        """
+        records = await self.stat(dirpath)
+        attr = "atime" if evict == "lru" else "mtime"
+        records.sort(key=lambda record: getattr(record, attr))
+        expired = -math.inf if max_age is None else time.time() - max_age
+        total = sum(record.size for record in records)
+        stats = GCStats()
+        # XXX: coverage branch broken: loop completes in
+        # ../../tests/unit/test_store.py::test_gc
+        for record in records:  # pragma: no branch
+            if getattr(record, attr) >= expired and (
+                max_bytes is None or total <= max_bytes
+            ):
+                break
+            path = dirpath / record.name
+            # serialised with writers
+            async with self.lock(path):
+                stats.nbytes += await self._evict(path, record.size)
+            total -= record.size
+            stats.names.append(record.name)
+        stats.nbytes += await self._gc_tmp(dirpath)
+        return stats
+
+    async def _gc_tmp(self, dirpath: anyio.Path) -> int:  # noqa: ARG002
+        """Remove files of writes interrupted in directory, returning the bytes freed"""
+        return 0
+
+    async def _evict(self, path: anyio.Path, size: int) -> int:
+        """Delete record of `size` bytes at path for `gc`, returning the bytes freed"""
+        # already gone is as good as evicted
+        with contextlib.suppress(FileNotFoundError):
+            await self.delete(path)
+        return size
+
+    async def discard(self, path: anyio.Path, data: BufferType) -> None:
+        """
+        Delete record at path if it still holds data
+
+        Used to drop a record that fails to decode without losing one written
+        concurrently by another worker
+        """
+        async with self.lock(path):
+            if await self.read(path) == data:
+                await self.delete(path)
+
+    @contextlib.asynccontextmanager
+    async def lock(
+        self,
+        path: anyio.Path,  # noqa: ARG002
+    ) -> AsyncGenerator[None, None]:
+        """Advisory exclusive lock on record at path"""
+        yield
+
+    async def close(self) -> None:
+        """Release resources held by the store"""
+
+
+FSYNC_CHOICES = ("never", "file", "dir")
+
+FSYNC_DEFAULT = FSYNC_CHOICES[0]
+
+FsyncType = Literal[*FSYNC_CHOICES]  # type: ignore[valid-type]
+
+
+class FileStore(Store):
+    """
+    One file per record
+
+    Writes go to a temporary file which is renamed into place so readers never see
+    a partial record. `fsync` is one of:
+
+    - never: leave flushing to the OS
+    - file: fsync the record before rename
+    - dir: as file, and fsync the directory after rename so the rename is durable
+
+    Writers are serialised per key, across tasks and processes, by `lock`
+
+    Records of at least `mmap_threshold` bytes are read as a `memoryview` of a
+    read-only memory map rather than copied into `bytes`. The map is released when
+    the last reference to the view is dropped.
+    """
+
+    LOCKNAME = ".lock"
+
+    # a temporary file of a write not renamed into place after this many seconds is
+    # of an interrupted writer, and removed by `gc`
+    TMP_MAX_AGE = 3600.0
+
+    def __init__(
+        self, fsync: FsyncType = FSYNC_DEFAULT, mmap_threshold: int | None = None
+    ) -> None:
+        self.fsync = fsync
+        self.mmap_threshold = mmap_threshold
+        self._lockfds: dict[pathlib.Path, int] = {}
+        self._locks: dict[tuple[pathlib.Path, int], anyio.Lock] = {}
+
+    async def read(self, path: anyio.Path) -> BufferType | None:
+        try:
+            return await (
+                path.read_bytes()
+                if self.mmap_threshold is None
+                else anyio.to_thread.run_sync(self._read, pathlib.Path(path))
+            )
+        except FileNotFoundError:
+            return None
+
+    def _read(self, path: pathlib.Path) -> BufferType:
+        with path.open("rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            return (
+                # an empty file cannot be mapped
+                file.read()
+                if not size or size < cast(int, self.mmap_threshold)
+                else memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            )
+
+    async def write(self, path: anyio.Path, data: BufferType) -> None:
+        async with self.lock(path):
+            await anyio.to_thread.run_sync(self._write, pathlib.Path(path), data)
+
+    def _write(self, path: pathlib.Path, data: BufferType) -> None:
+        fd, name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        tmp = pathlib.Path(name)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+                if self.fsync != "never":
+                    file.flush()
+                    os.fsync(fd)
+            tmp.replace(path)
+        except BaseException:
+            tmp.unlink()
+            raise
+        self._fsync_dir(path.parent)
+
+    def _fsync_dir(self, dirpath: pathlib.Path) -> None:
+        if self.fsync == "dir":
+            dirfd = os.open(dirpath, os.O_RDONLY)
+            try:
+                os.fsync(dirfd)
+            finally:
+                os.close(dirfd)
+
+    async def delete(self, path: anyio.Path) -> None:
+        await path.unlink()
+
+    async def exists(self, path: anyio.Path) -> bool:
+        return await path.exists()
+
+    async def keys(self, dirpath: anyio.Path) -> list[str]:
+        return await anyio.to_thread.run_sync(self._keys, dirpath)
+
+    @staticmethod
+    def _entries(dirpath: anyio.Path) -> list[os.DirEntry[str]]:
+        try:
+            with os.scandir(dirpath) as entries:
+                # dotfiles are the lock file and in-flight writes
+                return [
+                    entry
+                    for entry in entries
+                    if not entry.name.startswith(".") and entry.is_file()
+                ]
+        except FileNotFoundError:
+            return []
+
+    def _keys(self, dirpath: anyio.Path) -> list[str]:
+        return sorted(entry.name for entry in self._entries(dirpath))
+
+    def _tmp_entries(self, dirpath: pathlib.Path) -> list[os.DirEntry[str]]:
+        """Temporary files in directory older than `TMP_MAX_AGE`"""
+        expired = time.time() - self.TMP_MAX_AGE
+        try:
+            with os.scandir(dirpath) as entries:
+                return [
+                    entry
+                    for entry in entries
+                    if entry.name.startswith(".")
+                    and entry.name != self.LOCKNAME
+                    and entry.is_file()
+                    and entry.stat().st_mtime < expired
+                ]
+        except FileNotFoundError:
+            return []
+
+    def _remove_tmp(self, dirpath: pathlib.Path) -> int:
+        nbytes = 0
+        # XXX: coverage branch broken: loop does complete
+        for entry in self._tmp_entries(dirpath):  # pragma: no branch
+            # removed by another gc
+            with contextlib.suppress(FileNotFoundError):
+                size = entry.stat().st_size
+                pathlib.Path(entry.path).unlink()
+                nbytes += size
+        return nbytes
+
+    async def _gc_tmp(self, dirpath: anyio.Path) -> int:
+        return await anyio.to_thread.run_sync(self._remove_tmp, pathlib.Path(dirpath))
+
+    def _stat(self, dirpath: anyio.Path) -> list[RecordStat]:
+        stats = []
+        # XXX: coverage branch broken: loop does complete
+        for entry in self._entries(dirpath):  # pragma: no branch
+            with contextlib.suppress(FileNotFoundError):
+                stat = entry.stat()
+                stats.append(
+                    RecordStat(entry.name, stat.st_size, stat.st_atime, stat.st_mtime)
+                )
+        return stats
+
+    async def stat(self, dirpath: anyio.Path) -> list[RecordStat]:
+        return await anyio.to_thread.run_sync(self._stat, dirpath)
+
+    @staticmethod
+    def _touch(path: anyio.Path) -> None:
+        # atime is set explicitly so is recorded whatever the mount's atime policy.
+        # Times are read and set through one fd so a record renamed into place
+        # concurrently is not given the mtime of the one it replaced.
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            os.utime(fd, ns=(time.time_ns(), os.fstat(fd).st_mtime_ns))
+        finally:
+            os.close(fd)
+
+    async def touch(self, path: anyio.Path) -> None:
+        await anyio.to_thread.run_sync(self._touch, path)
+
+    @contextlib.asynccontextmanager
+    async def lock(self, path: anyio.Path) -> AsyncGenerator[None, None]:
+        """
+        Advisory exclusive lock on record at path
+
+        Each directory has a single lock file, records lock a one-byte range of it at
+        the crc32 of their name. POSIX record locks are held per process so tasks
+        within the process are serialised by an `anyio.Lock` per range.
+        """
+        dirpath = pathlib.Path(path.parent)
+        offset = zlib.crc32(path.name.encode())
+        key = (dirpath, offset)
+        lock = self._locks.setdefault(key, anyio.Lock())
+        async with lock:
+            fd = self._lockfd(dirpath)
+            await anyio.to_thread.run_sync(fcntl.lockf, fd, fcntl.LOCK_EX, 1, offset)
+            try:
+                yield
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN, 1, offset)
+        if not lock.locked() and not lock.statistics().tasks_waiting:
+            del self._locks[key]
+
+    def _lockfd(self, dirpath: pathlib.Path) -> int:
+        # the fd is held open for the life of the store: closing any fd on a file
+        # releases all of the process's record locks on it
+        fd = self._lockfds.get(dirpath)
+        # XXX: coverage branch broken: fd is cached in
+        # ../../tests/unit/test_store.py::test_file_lock_tasks
+        if fd is None:  # pragma: no branch
+            dirpath.mkdir(parents=True, exist_ok=True)
+            fd = self._lockfds[dirpath] = os.open(
+                dirpath / self.LOCKNAME, os.O_RDWR | os.O_CREAT, 0o644
+            )
+        return fd
+
+    async def close(self) -> None:
+        while self._lockfds:
+            os.close(self._lockfds.popitem()[1])
+
+
+class BlobStore(FileStore):
+    """
+    Content-addressed records: each distinct payload is stored once
+
+    A payload is written to `<dir>/.blob/<sha256>` and each record is a hard link to
+    it, so reads are unchanged and the link count is the reference count. A blob is
+    removed when the last record linking to it is overwritten or deleted.
+
+    Records sharing a blob share its inode, so access and write times are kept per
+    record on a file at `<dir>/.meta/<name>`, which holds the blob's digest so that
+    it is not re-read to unlink a record. `gc` counts a blob's bytes as freed only
+    when its last record is evicted.
+    """
+
+    BLOBDIR = ".blob"
+
+    METADIR = ".meta"
+
+    def _blob(self, path: pathlib.Path, data: BufferType) -> pathlib.Path:
+        return path.parent / self.BLOBDIR / hashlib.sha256(data).hexdigest()
+
+    def _last_ref(self, path: pathlib.Path) -> pathlib.Path | None:
+        """Blob that record at path is the last reference to, if any"""
+        try:
+            stat = path.stat()
+            # only the record and the blob itself
+            # XXX: coverage branch broken: both in
+            # ../../tests/unit/test_store.py::test_blob
+            if stat.st_nlink != 2:  # pragma: no branch
+                return None
+            # the digest is written before the record is replaced, so may be that of
+            # a write interrupted in between
+            with contextlib.suppress(FileNotFoundError):
+                blob = path.parent / self.BLOBDIR / self._meta(path).read_text()
+                # XXX: coverage branch broken: stale in
+                # ../../tests/unit/test_store.py::test_blob
+                if blob.stat().st_ino == stat.st_ino:  # pragma: no branch
+                    return blob
+            return self._blob(path, path.read_bytes())
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _unref(blob: pathlib.Path) -> int:
+        """Remove blob if no record links to it, returning the bytes freed"""
+        with contextlib.suppress(FileNotFoundError):
+            stat = blob.stat()
+            # XXX: coverage branch broken: blob is still referenced in
+            # ../../tests/unit/test_store.py::test_blob
+            if stat.st_nlink == 1:  # pragma: no branch
+                blob.unlink()
+                return stat.st_size
+        return 0
+
+    def _meta(self, path: pathlib.Path) -> pathlib.Path:
+        return path.parent / self.METADIR / path.name
+
+    def _write(self, path: pathlib.Path, data: BufferType) -> None:
+        blob = self._blob(path, data)
+        orphan = self._last_ref(path)
+        tmp = path.with_name(f".{path.name}.{secrets.token_hex(8)}")
+        while True:
+            if not blob.exists():
+                blob.parent.mkdir(exist_ok=True)
+                super()._write(blob, data)
+            # the blob may be removed by a concurrent delete, in which case rewrite
+            with contextlib.suppress(FileNotFoundError):
+                tmp.hardlink_to(blob)
+                break
+        # times before the record so a record always has them
+        meta = self._meta(path)
+        meta.parent.mkdir(exist_ok=True)
+        meta.write_text(blob.name)
+        tmp.replace(path)
+        self._fsync_dir(path.parent)
+        if orphan is not None and orphan != blob:
+            self._unref(orphan)
+
+    def _delete(self, path: pathlib.Path) -> int:
+        orphan = self._last_ref(path)
+        path.unlink()
+        self._meta(path).unlink(missing_ok=True)
+        return 0 if orphan is None else self._unref(orphan)
+
+    async def delete(self, path: anyio.Path) -> None:
+        await anyio.to_thread.run_sync(self._delete, pathlib.Path(path))
+
+    async def _evict(self, path: anyio.Path, size: int) -> int:  # noqa: ARG002
+        try:
+            return await anyio.to_thread.run_sync(self._delete, pathlib.Path(path))
+        except FileNotFoundError:
+            return 0
+
+    def _stat(self, dirpath: anyio.Path) -> list[RecordStat]:
+        stats = []
+        # XXX: coverage branch broken: loop does complete
+        for record in super()._stat(dirpath):  # pragma: no branch
+            # no times is a record deleted since the scan
+            with contextlib.suppress(FileNotFoundError):
+                meta = self._meta(pathlib.Path(dirpath, record.name)).stat()
+                stats.append(
+                    msgspec.structs.replace(
+                        record, atime=meta.st_atime, mtime=meta.st_mtime
+                    )
+                )
+        return stats
+
+    async def touch(self, path: anyio.Path) -> None:
+        await super().touch(anyio.Path(self._meta(pathlib.Path(path))))
+
+    def _remove_tmp(self, dirpath: pathlib.Path) -> int:
+        # links of interrupted writes free nothing by themselves
+        super()._remove_tmp(dirpath)
+        blobdir = dirpath / self.BLOBDIR
+        nbytes = super()._remove_tmp(blobdir)
+        # blobs those links, or a write interrupted before linking, left unreferenced
+        expired = time.time() - self.TMP_MAX_AGE
+        # XXX: coverage branch broken: loop does complete
+        for entry in self._entries(anyio.Path(blobdir)):  # pragma: no branch
+            with contextlib.suppress(FileNotFoundError):
+                # XXX: coverage branch broken: both in
+                # ../../tests/unit/test_store.py::test_gc_tmp
+                if entry.stat().st_mtime < expired:  # pragma: no branch
+                    nbytes += self._unref(pathlib.Path(entry.path))
+        return nbytes
+
+
+class SqliteStore(Store):
+    """
+    One sqlite database per class
+
+    Record `<dir>/<name>` is row `<name>` in `<dir>/store.sqlite`
+    """
+
+    FILENAME = "store.sqlite"
+
+    def __init__(self) -> None:
+        self._connections: dict[pathlib.Path, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def _connection(
+        self, dirpath: anyio.Path, *, create: bool = False
+    ) -> sqlite3.Connection | None:
+        dbpath = pathlib.Path(dirpath, self.FILENAME)
+        conn = self._connections.get(dbpath)
+        # XXX: coverage branch broken under worker threads - both branches are
+        # exercised in ../../tests/unit/test_store.py
+        if conn is None:  # pragma: no branch
+            if not create and not dbpath.exists():  # pragma: no branch
+                return None
+            dbpath.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connections[dbpath] = sqlite3.connect(
+                dbpath, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS record"
+                " (key TEXT PRIMARY KEY, data BLOB, atime REAL, mtime REAL)"
+            )
+        return conn
+
+    def _read(self, path: anyio.Path) -> bytes | None:
+        with self._lock:
+            conn = self._connection(path.parent)
+            # XXX: coverage branch broken: see _connection
+            if conn is None:  # pragma: no branch
+                return None
+            row = conn.execute(
+                "SELECT data FROM record WHERE key = ?", (path.name,)
+            ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    async def read(self, path: anyio.Path) -> bytes | None:
+        return await anyio.to_thread.run_sync(self._read, path)
+
+    def _write(self, path: anyio.Path, data: BufferType) -> None:
+        with self._lock:
+            cast(
+                sqlite3.Connection, self._connection(path.parent, create=True)
+            ).execute(
+                "INSERT OR REPLACE INTO record (key, data, atime, mtime)"
+                " VALUES (?, ?, ?, ?)",
+                (path.name, data, now := time.time(), now),
+            )
+
+    async def write(self, path: anyio.Path, data: BufferType) -> None:
+        await anyio.to_thread.run_sync(self._write, path, data)
+
+    def _delete(self, path: anyio.Path) -> None:
+        with self._lock:
+            conn = self._connection(path.parent)
+            if (
+                conn is None
+                or not conn.execute(
+                    "DELETE FROM record WHERE key = ?", (path.name,)
+                ).rowcount
+            ):
+                raise FileNotFoundError(path)
+
+    async def delete(self, path: anyio.Path) -> None:
+        await anyio.to_thread.run_sync(self._delete, path)
+
+    def _exists(self, path: anyio.Path) -> bool:
+        with self._lock:
+            conn = self._connection(path.parent)
+            return conn is not None and bool(
+                conn.execute(
+                    "SELECT 1 FROM record WHERE key = ?", (path.name,)
+                ).fetchone()
+            )
+
+    async def exists(self, path: anyio.Path) -> bool:
+        return await anyio.to_thread.run_sync(self._exists, path)
+
+    def _keys(self, dirpath: anyio.Path) -> list[str]:
+        with self._lock:
+            conn = self._connection(dirpath)
+            return (
+                []
+                if conn is None
+                else [
+                    row[0]
+                    for row in conn.execute("SELECT key FROM record ORDER BY key")
+                ]
+            )
+
+    async def keys(self, dirpath: anyio.Path) -> list[str]:
+        return await anyio.to_thread.run_sync(self._keys, dirpath)
+
+    def _stat(self, dirpath: anyio.Path) -> list[RecordStat]:
+        with self._lock:
+            conn = self._connection(dirpath)
+            return (
+                []
+                if conn is None
+                else [
+                    RecordStat(*row)
+                    for row in conn.execute(
+                        "SELECT key, length(data), atime, mtime FROM record"
+                    )
+                ]
+            )
+
+    async def stat(self, dirpath: anyio.Path) -> list[RecordStat]:
+        return await anyio.to_thread.run_sync(self._stat, dirpath)
+
+    def _touch(self, path: anyio.Path) -> None:
+        with self._lock:
+            conn = self._connection(path.parent)
+            # XXX: coverage branch broken: see _connection
+            if conn is not None:  # pragma: no branch
+                conn.execute(
+                    "UPDATE record SET atime = ? WHERE key = ?",
+                    (time.time(), path.name),
+                )
+
+    async def touch(self, path: anyio.Path) -> None:
+        await anyio.to_thread.run_sync(self._touch, path)
+
+    def _discard(self, path: anyio.Path, data: BufferType) -> None:
+        with self._lock:
+            conn = self._connection(path.parent)
+            # XXX: coverage branch broken: see _connection
+            if conn is not None:  # pragma: no branch
+                conn.execute(
+                    "DELETE FROM record WHERE key = ? AND data = ?", (path.name, data)
+                )
+
+    async def discard(self, path: anyio.Path, data: BufferType) -> None:
+        await anyio.to_thread.run_sync(self._discard, path, data)
+
+    def _close(self) -> None:
+        with self._lock:
+            while self._connections:
+                self._connections.popitem()[1].close()
+
+    async def close(self) -> None:
+        await anyio.to_thread.run_sync(self._close)
+
+
+class IndexedStore(Store):
+    """
+    In-memory index of record names, per directory, in front of another store
+
+    A directory's index is loaded from the backend on first use and updated by
+    `write` and `delete`, so a miss in `read` or `exists` is answered without
+    touching the backend. Records written by another process after the index is
+    loaded are not seen until `refresh`.
+    """
+
+    def __init__(self, store: Store) -> None:
+        self.store = store
+        self._index: dict[anyio.Path, set[str]] = {}
+        self._loading: dict[anyio.Path, anyio.Lock] = {}
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.store!r}>"
+
+    async def _names(self, dirpath: anyio.Path) -> set[str]:
+        names = self._index.get(dirpath)
+        # XXX: coverage branch broken: index is loaded in
+        # ../../tests/unit/test_store.py::test_indexed
+        if names is None:  # pragma: no branch
+            async with self._loading.setdefault(dirpath, anyio.Lock()):
+                names = self._index.get(dirpath)
+                # XXX: coverage branch broken: loaded while waiting in
+                # ../../tests/unit/test_store.py::test_indexed_load
+                if names is None:  # pragma: no branch
+                    names = self._index[dirpath] = set(await self.store.keys(dirpath))
+            self._loading.pop(dirpath, None)
+        return names
+
+    def refresh(self, dirpath: anyio.Path | None = None) -> None:
+        """Drop index for directory, or all directories, to be reloaded on next use"""
+        if dirpath is None:
+            self._index.clear()
+        else:
+            self._index.pop(dirpath, None)
+
+    async def read(self, path: anyio.Path) -> BufferType | None:
+        return (
+            await self.store.read(path)
+            if path.name in await self._names(path.parent)
+            else None
+        )
+
+    async def write(self, path: anyio.Path, data: BufferType) -> None:
+        names = await self._names(path.parent)
+        await self.store.write(path, data)
+        names.add(path.name)
+
+    async def delete(self, path: anyio.Path) -> None:
+        (await self._names(path.parent)).discard(path.name)
+        await self.store.delete(path)
+
+    async def _evict(self, path: anyio.Path, size: int) -> int:
+        (await self._names(path.parent)).discard(path.name)
+        return await self.store._evict(path, size)
+
+    async def _gc_tmp(self, dirpath: anyio.Path) -> int:
+        return await self.store._gc_tmp(dirpath)
+
+    async def discard(self, path: anyio.Path, data: BufferType) -> None:
+        names = await self._names(path.parent)
+        await self.store.discard(path, data)
+        if not await self.store.exists(path):
+            names.discard(path.name)
+
+    async def exists(self, path: anyio.Path) -> bool:
+        return path.name in await self._names(path.parent)
+
+    async def keys(self, dirpath: anyio.Path) -> list[str]:
+        return sorted(await self._names(dirpath))
+
+    async def stat(self, dirpath: anyio.Path) -> list[RecordStat]:
+        return await self.store.stat(dirpath)
+
+    async def touch(self, path: anyio.Path) -> None:
+        await self.store.touch(path)
+
+    @contextlib.asynccontextmanager
+    async def lock(self, path: anyio.Path) -> AsyncGenerator[None, None]:
+        async with self.store.lock(path):
+            yield
+
+    async def close(self) -> None:
+        self.refresh()
+        await self.store.close()
+
+
+__all__ = (
+    "BlobStore",
+    "BufferType",
+    "EvictType",
+    "FileStore",
+    "GCStats",
+    "IndexedStore",
+    "RecordStat",
+    "SqliteStore",
+    "Store",
+)
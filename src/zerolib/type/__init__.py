@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from .node import FrozenNode, Node
-from .struct import FrozenStruct, Struct, field, register_ext_type, union
+from .struct import CompactStruct, FrozenStruct, Struct, field, register_ext_type, union
 
 __all__ = (
+    "CompactStruct",
     "FrozenNode",
     "FrozenStruct",
     "Node",
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import contextlib
 import functools
-from collections.abc import Callable
+import hashlib
+import weakref
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
 from typing import (
+    IO,
     Any,
     ClassVar,
+    Literal,
+    NoReturn,
     Self,
     Union,
     cast,
@@ -13,19 +19,40 @@ from typing import (
 )
 
 import anyio
+import msgpack
 import msgspec
+from anyio.abc import ByteReceiveStream
 
 # export msgspec field for import convenience
 from msgspec import field, structs
 
-from .. import serialize, util
+from .. import compress, serialize, store, util
 from ..context import Context
 from ..dic import Dic
 from ..loguru_compat import Logger, log
 
 EncoderType = Callable[["Struct"], bytes]
 
-DecoderType = Callable[[bytes], "Struct"]
+DecoderType = Callable[[bytes | memoryview], "Struct"]
+
+LinesDecoderType = Callable[[bytes | memoryview], list["Struct"]]
+
+STREAM_CHOICES = ("msgpack", "json")
+
+StreamType = Literal[*STREAM_CHOICES]  # type: ignore[valid-type]
+
+# bytes read at a time from a stream of records
+STREAM_READ_SIZE = 64 << 10
+
+
+# decoders are built for the state of the registries - cleared on change to them
+_DECODER_INSTANCES: weakref.WeakSet[Decoder] = weakref.WeakSet()
+
+
+def _clear_decoders() -> None:
+    # XXX: coverage branch broken - loop does complete
+    for decoder in _DECODER_INSTANCES:  # pragma: no branch
+        decoder.clear()
 
 
 # msgpack ext types
@@ -36,6 +63,7 @@ EXT_TYPES: dict[type, int] = {}
 def register_ext_type(cls: type) -> int:
     index = len(EXT_TYPES) + 1
     EXT_TYPES[cls] = index
+    _clear_decoders()
     return index
 
 
@@ -46,18 +74,62 @@ register_ext_type(anyio.Path)
 # hooks for custom encoders and decoders
 ENCODERS: dict[type, EncoderType] = {}
 DECODERS: dict[type, DecoderType] = {}
+# types whose DECODERS hook accepts the ext payload as a memoryview, saving a copy
+MEMORYVIEW_DECODERS: set[type] = set()
 
 
 class Encoder:
+    # buffers allocated larger than this are dropped rather than returned to the pool
+    BUFFER_MAX = 1 << 20
+
+    # sets and dicts sorted, so equal structs encode the same whatever the hash seed
+    # or insertion order - the `BlobStore` address depends on it
+    ORDER: Literal["deterministic"] = "deterministic"
+
     @util.cached_property
     def json(self) -> EncoderType:
-        encoder = msgspec.json.Encoder(enc_hook=str)
-        return lambda obj: encoder.encode(obj)
+        return cast(EncoderType, self._json.encode)
+
+    @util.cached_property
+    def _json(self) -> msgspec.json.Encoder:
+        return msgspec.json.Encoder(enc_hook=str, order=self.ORDER)
 
     @util.cached_property
     def msgpack(self) -> EncoderType:
-        encoder = msgspec.msgpack.Encoder(enc_hook=self._msgpack_encode)
-        return lambda obj: encoder.encode(obj)
+        return cast(EncoderType, self._msgpack.encode)
+
+    @util.cached_property
+    def _msgpack(self) -> msgspec.msgpack.Encoder:
+        return msgspec.msgpack.Encoder(enc_hook=self._msgpack_encode, order=self.ORDER)
+
+    def encode_into(
+        self,
+        obj: Struct,
+        fmt: serialize.FormatType,
+        buffer: bytearray,
+        offset: int = 0,
+    ) -> None:
+        """Encode into `buffer` from `offset`, resizing it to fit"""
+        if fmt == "yaml":
+            buffer[offset:] = self.yaml(obj)
+        else:
+            getattr(self, f"_{fmt}").encode_into(obj, buffer, offset)
+
+    @contextlib.contextmanager
+    def buffer(self) -> Iterator[bytearray]:
+        """Buffer for `encode_into` from a pool, returned to it on exit"""
+        buffer = self._buffers.pop() if self._buffers else bytearray()
+        try:
+            yield buffer
+        finally:
+            # encoding truncates a buffer without freeing it so its allocation,
+            # rather than its length, is what the pool holds on to
+            if buffer.__sizeof__() <= self.BUFFER_MAX:
+                self._buffers.append(buffer)
+
+    @util.cached_property
+    def _buffers(self) -> list[bytearray]:
+        return []
 
     # fallback for unsupported on msgpack encode
     @staticmethod
@@ -71,49 +143,65 @@ class Encoder:
 
     @util.cached_property
     def yaml(self) -> EncoderType:
-        return functools.partial(msgspec.yaml.encode, enc_hook=str)
+        return functools.partial(msgspec.yaml.encode, enc_hook=str, order=self.ORDER)
 
 
 class Decoder:
-    @util.cached_property
-    def json(self) -> DecoderType:
-        decoder = msgspec.json.Decoder(
-            type=self._typed_union,
-            dec_hook=self._dec_hook,
-        )
-        return lambda buf: decoder.decode(buf)
+    """Decoders typed per class, built on first use"""
 
-    @util.cached_property
-    def msgpack(self) -> DecoderType:
-        decoder = msgspec.msgpack.Decoder(
-            type=self._typed_union,
-            dec_hook=self._dec_hook,
-            ext_hook=self._msgpack_ext_hook,
+    def __init__(self) -> None:
+        self._decoders: dict[tuple[type, str], Callable[..., Any]] = {}
+        self._msgpack_ext_types: dict[int, type] = {}
+        self.clear()
+        _DECODER_INSTANCES.add(self)
+
+    def clear(self) -> None:
+        """Drop decoders built before a change to `union` or `register_ext_type`"""
+        self._decoders.clear()
+        self._msgpack_ext_types = {v: k for k, v in EXT_TYPES.items()}
+
+    def typed(self, cls: type[Struct], fmt: serialize.FormatType) -> DecoderType:
+        """Decoder for `cls` and its subclasses joined to the union"""
+        return cast(DecoderType, self._typed(cls, fmt))
+
+    def lines(self, cls: type[Struct]) -> LinesDecoderType:
+        """Newline-delimited json decoder for `cls`, see `typed`"""
+        return cast(LinesDecoderType, self._typed(cls, "lines"))
+
+    def _typed(self, cls: type[Struct], fmt: str) -> Callable[..., Any]:
+        key = (cls, fmt)
+        try:
+            return self._decoders[key]
+        except KeyError:
+            decoder = self._decoders[key] = self._decoder(
+                fmt, Union[cls, *(t for t in UNION_TYPES if issubclass(t, cls))]
+            )
+            return decoder
+
+    def _decoder(self, fmt: str, type: Any) -> Callable[..., Any]:
+        # XXX: coverage branch broken: yaml in
+        # ../../tests/unit/type/test_struct.py::test_serde
+        if fmt == "yaml":  # pragma: no branch
+            return functools.partial(
+                msgspec.yaml.decode, type=type, dec_hook=self._dec_hook
+            )
+        kwargs = {"ext_hook": self._msgpack_ext_hook} if fmt == "msgpack" else {}
+        decoder = getattr(msgspec, "json" if fmt == "lines" else fmt).Decoder(
+            type=type, dec_hook=self._dec_hook, **kwargs
+        )
+        return cast(
+            Callable[..., Any],
+            decoder.decode_lines if fmt == "lines" else decoder.decode,
         )
-        return lambda buf: decoder.decode(buf)
 
     def _msgpack_ext_hook(self, code: int, data: memoryview) -> Any:
         cls = self._msgpack_ext_types.get(code)
         if cls is None:
             raise NotImplementedError(f"ext_hook: type undefined for EXT code {code}")
-        decoder = DECODERS.get(cls, cast(DecoderType, lambda data: cls(data.decode())))
-        return decoder(data.tobytes())
-
-    @util.cached_property
-    def _msgpack_ext_types(self) -> dict[int, type]:
-        return {v: k for k, v in EXT_TYPES.items()}
-
-    @util.cached_property
-    def yaml(self) -> DecoderType:
-        return functools.partial(
-            msgspec.yaml.decode,
-            type=self._typed_union,
-            dec_hook=self._dec_hook,
-        )
-
-    @util.cached_property
-    def _typed_union(self) -> Union | Any:
-        return Union[*UNION_TYPES] if UNION_TYPES else Any
+        decoder = DECODERS.get(cls)
+        if decoder is None:
+            return cls(str(data, "utf-8"))
+        return decoder(data if cls in MEMORYVIEW_DECODERS else data.tobytes())
 
     @staticmethod
     def _dec_hook(cls: type, obj: Any) -> Any:
@@ -132,7 +220,7 @@ class Struct(
     omit_defaults=True,
     forbid_unknown_fields=True,
     tag=True,
-    # TODO: maybe faster, but less debugability: array_like=True,
+    # array_like=True is opt-in per class with CompactStruct
     dict=True,
 ):
     ctx: ClassVar[Context] = Context.factory()
@@ -140,6 +228,20 @@ class Struct(
     _encoder: ClassVar[Encoder] = Encoder()
     _decoder: ClassVar[Decoder] = Decoder()
 
+    _db_suffix: ClassVar[str] = ".msgpack"
+
+    db_compression: ClassVar[compress.Compression | None] = None
+    """Compression of stored instances, overrides `ctx.compression`"""
+
+    db_max_bytes: ClassVar[int | None] = None
+    """Evict stored instances, oldest first, above this total size"""
+
+    db_max_age: ClassVar[float | None] = None
+    """Evict stored instances older than this many seconds"""
+
+    db_evict: ClassVar[store.EvictType] = store.EVICT_DEFAULT
+    """Age from last access by `get` (lru) or from last `put` (ttl)"""
+
     @util.cached_property
     def log(self) -> Logger:
         return log.bind(self=self)
@@ -198,30 +300,69 @@ class Struct(
     @classmethod
     async def get(
         cls,
-        key: str | anyio.Path,
+        key: str | anyio.Path | Self,
         default: Any = None,
     ) -> Self | Any:
         # XXX: coverage branch broken: cls.ctx.cache is False in
         # ../../tests/unit/type/test_struct.py::test_store_path_nocache
         if cls.ctx.cache:  # pragma: no branch
             path = key if isinstance(key, anyio.Path) else cls.db_path(key)
-            try:
-                encoded = await path.read_bytes()
-            except FileNotFoundError:
+            db = cls.ctx.store
+            if cls.ctx.memcache and (cached := cls.ctx.lru.get(path)) is not None:
+                # a hit in memory is an access all the same
+                if cls._db_track_access():
+                    await db.touch(path)
+                return await cls.decode(cached)._db_attach(path)
+            encoded = await db.read(path)
+            if encoded is None:
                 log.debug(f"miss: {path}")
             else:
                 try:
-                    self = cls.decode(encoded)
+                    decompressed = compress.decompress(encoded, cls._db_zdict())
+                    self = cls.decode(decompressed)
                 except Exception as exc:
-                    log.opt(exception=exc).error(f"get: decode fail - unlinking {path}")
-                    await path.unlink()
+                    log.opt(exception=exc).error(
+                        f"get: decode fail - discarding {path}"
+                    )
+                    await db.discard(path, encoded)
                 else:
                     self.log.debug(f"hit: {path}")
-                    structs.force_setattr(self, "_db_path", path)
-                    await self._set_runtime_state()
-                    return self
+                    if cls._db_track_access():
+                        await db.touch(path)
+                    if cls.ctx.memcache:
+                        cls.ctx.lru.put(path, bytes(decompressed), len(decompressed))
+                    return await self._db_attach(path)
         return default
 
+    async def _db_attach(self, path: anyio.Path) -> Self:
+        """Set db path and runtime state of an instance decoded from path"""
+        structs.force_setattr(self, "_db_path", path)
+        await self._set_runtime_state()
+        return self
+
+    @classmethod
+    async def get_many(
+        cls,
+        keys: Iterable[str | anyio.Path | Self],
+        default: Any = None,
+        limit: int | None = None,
+    ) -> list[Self | Any]:
+        """
+        Get concurrently, at most `limit` (default `ctx.concurrency`) at a time
+
+        Results are in order of `keys`, with `default` for misses
+        """
+        return await util.amap(
+            functools.partial(cls.get, default=default),
+            keys,
+            limit or cls.ctx.concurrency,
+        )
+
+    @classmethod
+    async def put_many(cls, objs: Iterable[Self], limit: int | None = None) -> None:
+        """Put concurrently, at most `limit` (default `ctx.concurrency`) at a time"""
+        await util.amap(lambda obj: obj.put(), objs, limit or cls.ctx.concurrency)
+
     async def put(self, path: anyio.Path | None = None) -> None:
         # XXX: coverage branch broken: cls.ctx.cache is False in
         # ../../tests/unit/type/test_struct.py::test_store_path_nocache
@@ -231,28 +372,168 @@ class Struct(
             if path is None:  # pragma: no branch
                 path = self.db_path(self)
             structs.force_setattr(self, "_db_path", path)
-            # TODO: lock
-            await path.parent.mkdir(parents=True, exist_ok=True)
-            await path.write_bytes(self.encode())
+            compression = self._db_compression()
+            with self._encoder.buffer() as buffer:
+                self.encode_into(buffer)
+                with memoryview(buffer) as encoded:
+                    await self.ctx.store.write(
+                        path,
+                        encoded
+                        if compression is None
+                        else compression.compress(encoded),
+                    )
+                    if self.ctx.memcache:
+                        self.ctx.lru.put(path, bytes(encoded), len(encoded))
+                    else:
+                        self.ctx.lru.pop(path)
             self.log.debug(f"wrote {path}")
 
+    @classmethod
+    def db_dir(cls) -> anyio.Path:
+        return cls.ctx.cachedir / "db" / cls.__name__.lower()
+
     @classmethod
     def db_path(cls, key: str | Self) -> anyio.Path:
-        return cls.ctx.cachedir / "db" / cls.__name__.lower() / f"{key}.msgpack"
+        return cls.db_dir() / f"{key}{cls._db_suffix}"
+
+    @classmethod
+    async def exists(cls, key: str | anyio.Path | Self) -> bool:
+        return cast(
+            bool,
+            await cls.ctx.store.exists(
+                key if isinstance(key, anyio.Path) else cls.db_path(key)
+            ),
+        )
+
+    @classmethod
+    async def keys(cls) -> list[str]:
+        """Keys of stored instances"""
+        return [
+            name.removesuffix(cls._db_suffix)
+            for name in await cls.ctx.store.keys(cls.db_dir())
+            if name.endswith(cls._db_suffix)
+        ]
 
     async def delete(self) -> None:
-        await self._db_path.unlink()  # type: ignore[attr-defined]
+        self.ctx.lru.pop(self._db_path)  # type: ignore[attr-defined]
+        await self.ctx.store.delete(self._db_path)  # type: ignore[attr-defined]
         self.log.debug(f"deleted {self._db_path}")  # type: ignore[attr-defined]
 
+    @classmethod
+    def _db_compression(cls) -> compress.Compression | None:
+        return cls.db_compression or cls.ctx.compression
+
+    @classmethod
+    def _db_zdict(cls) -> bytes | None:
+        compression = cls._db_compression()
+        return None if compression is None else compression.zdict
+
+    @classmethod
+    def _db_track_access(cls) -> bool:
+        """Whether `get` records access, only needed for bounded lru eviction"""
+        return cls.db_evict == "lru" and (
+            cls.db_max_bytes is not None or cls.db_max_age is not None
+        )
+
+    @classmethod
+    async def gc(cls) -> store.GCStats:
+        """Evict stored instances per `db_max_bytes`, `db_max_age` and `db_evict`"""
+        stats: store.GCStats = await cls.ctx.store.gc(
+            cls.db_dir(), cls.db_max_bytes, cls.db_max_age, cls.db_evict
+        )
+        for name in stats.names:
+            cls.ctx.lru.pop(cls.db_dir() / name)
+        log.debug(f"gc {cls.__name__}: {stats.entries} entries, {stats.nbytes} bytes")
+        return stats
+
+    @classmethod
+    async def gc_forever(cls, interval: float) -> NoReturn:
+        """Run `gc` every `interval` seconds, for a background task"""
+        while True:
+            await cls.gc()
+            await anyio.sleep(interval)
+
     @classmethod
     def decode(
-        cls, encoded: bytes, type: serialize.FormatType = serialize.FAST_SERIALIZER
+        cls,
+        encoded: bytes | memoryview,
+        type: serialize.FormatType = serialize.FAST_SERIALIZER,
     ) -> Self:
-        return cast(Self, getattr(cls._decoder, type)(encoded))
+        return cast(Self, cls._decoder.typed(cls, type)(encoded))
 
     def encode(self, type: serialize.FormatType = serialize.FAST_SERIALIZER) -> bytes:
         return cast(bytes, getattr(self._encoder, type)(self))
 
+    def encode_into(
+        self,
+        buffer: bytearray,
+        offset: int = 0,
+        type: serialize.FormatType = serialize.FAST_SERIALIZER,
+    ) -> None:
+        """Encode into `buffer` from `offset`, see `Encoder.buffer` for reuse"""
+        self._encoder.encode_into(self, type, buffer, offset)
+
+    @classmethod
+    def encode_many(
+        cls, objs: Iterable[Self], type: StreamType = "msgpack"
+    ) -> Iterator[bytes]:
+        """
+        Encode to a stream of records, one chunk per record
+
+        msgpack records are concatenated, as read by `msgpack.Unpacker` and
+        `serialize.iterload`, json records end with a newline. Write to a file with
+        `writelines` or to an anyio stream with `send`.
+        """
+        for obj in objs:
+            encoded = obj.encode(type)
+            yield encoded if type == "msgpack" else encoded + b"\n"
+
+    @classmethod
+    def decode_stream(
+        cls, file: IO[bytes], type: StreamType = "msgpack"
+    ) -> Iterator[Self]:
+        """Decode a stream written by `encode_many` from a binary file"""
+        if type == "json":
+            decode_lines = cls._decoder.lines(cls)
+            tail = b""
+            for chunk in iter(functools.partial(file.read, STREAM_READ_SIZE), b""):
+                lines, _, tail = (tail + chunk).rpartition(b"\n")
+                yield from cast(list[Self], decode_lines(lines))
+            yield from cast(list[Self], decode_lines(tail))
+        else:
+            decode = cls._decoder.typed(cls, type)
+            records = _MsgpackRecords()
+            for chunk in iter(functools.partial(file.read, STREAM_READ_SIZE), b""):
+                # XXX: coverage branch broken - loop does complete
+                for encoded in records.feed(chunk):  # pragma: no branch
+                    yield cast(Self, decode(encoded))
+            records.close()
+
+    @classmethod
+    async def decode_stream_async(
+        cls, stream: ByteReceiveStream, type: StreamType = "msgpack"
+    ) -> AsyncIterator[Self]:
+        """Decode a stream written by `encode_many` from an anyio byte stream"""
+        if type == "json":
+            decode_lines = cls._decoder.lines(cls)
+            tail = b""
+            async for chunk in stream:
+                lines, _, tail = (tail + chunk).rpartition(b"\n")
+                # XXX: coverage branch broken - loop does complete
+                for obj in decode_lines(lines):  # pragma: no branch
+                    yield cast(Self, obj)
+            # XXX: coverage branch broken - loop does complete
+            for obj in decode_lines(tail):  # pragma: no branch
+                yield cast(Self, obj)
+        else:
+            decode = cls._decoder.typed(cls, type)
+            records = _MsgpackRecords()
+            async for chunk in stream:
+                # XXX: coverage branch broken - loop does complete
+                for encoded in records.feed(chunk):  # pragma: no branch
+                    yield cast(Self, decode(encoded))
+            records.close()
+
     def replace(self, **changes: Any) -> Self:
         return msgspec.structs.replace(self, **changes)
 
@@ -260,20 +541,116 @@ class Struct(
         return Dic(msgspec.structs.asdict(self))
 
 
+class _MsgpackRecords:
+    """Split a stream of concatenated msgpack objects into their encodings"""
+
+    def __init__(self) -> None:
+        self._unpacker = msgpack.Unpacker()  # type: ignore[attr-defined]
+        self._buffer = b""
+        # stream offset of the start of the buffer
+        self._offset = 0
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Records completed by chunk"""
+        self._unpacker.feed(chunk)
+        self._buffer += chunk
+        records = []
+        start = 0
+        while True:
+            try:
+                self._unpacker.skip()
+            except msgpack.OutOfData:  # type: ignore[attr-defined]
+                break
+            end = self._unpacker.tell() - self._offset
+            records.append(self._buffer[start:end])
+            start = end
+        self._buffer = self._buffer[start:]
+        self._offset += start
+        return records
+
+    def close(self) -> None:
+        """Raise `anyio.IncompleteRead` if the stream ends within a record"""
+        if self._buffer:
+            raise anyio.IncompleteRead
+
+
 class FrozenStruct(Struct, frozen=True):  # type: ignore[misc]
     ...
 
 
+class _CompactMeta(msgspec.StructMeta):
+    """Tag each class with a fingerprint of its field layout"""
+
+    def __new__(
+        mcls,
+        name: str,
+        bases: tuple[type, ...],
+        namespace: dict[str, Any],
+        **kwargs: Any,
+    ) -> _CompactMeta:
+        schema = [
+            getattr(base, "__schema__", getattr(base, "__struct_fields__", ()))
+            for base in bases
+        ]
+        schema.extend(
+            (key, str(value))
+            for key, value in namespace.get("__annotations__", {}).items()
+            if not str(value).startswith(("ClassVar", "typing.ClassVar"))
+        )
+        namespace["__schema__"] = hashlib.sha256(repr(schema).encode()).hexdigest()[:8]
+        kwargs.setdefault("tag", f"{name}:{namespace['__schema__']}")
+        return super().__new__(mcls, name, bases, namespace, array_like=True, **kwargs)
+
+
+class CompactStruct(Struct, metaclass=_CompactMeta):
+    """
+    Struct encoded as an array of field values rather than a map of names to values
+
+    Smaller and faster to encode and decode, at the cost of readability - see
+    `expand`. The tag carries a fingerprint of the field names and types, so a record
+    written before a change to the fields fails to decode rather than decoding into
+    the wrong fields, and `get` discards it.
+
+    Compact classes cannot join the `union`.
+    """
+
+    __schema__: ClassVar[str]
+
+    @classmethod
+    def expand(
+        cls,
+        encoded: bytes | memoryview,
+        type: serialize.FormatType = serialize.FAST_SERIALIZER,
+    ) -> Dic:
+        """Decode without validation to a Dic of field name to value, for debugging"""
+        values = (
+            msgspec.msgpack.decode(encoded, ext_hook=cls._decoder._msgpack_ext_hook)
+            if type == "msgpack"
+            else getattr(msgspec, type).decode(encoded)
+        )
+        # XXX: coverage branch broken: schema mismatch in
+        # ../../tests/unit/type/test_struct.py::test_compact_schema
+        if values[0] != cls.__struct_config__.tag:  # pragma: no branch
+            raise ValueError(
+                f"{cls.__name__}: schema {values[0]!r} != {cls.__struct_config__.tag!r}"
+            )
+        return Dic(zip(("type", *cls.__struct_encode_fields__), values, strict=False))
+
+
 UNION_TYPES: set[type[Struct]] = set()
 
 
 def union(cls: type[Struct]) -> type[Struct]:
     """Join class to the tagged union used by msgspec decoder"""
+    if cls.__struct_config__.array_like:
+        raise TypeError(f"{cls.__name__}: array_like struct cannot join the union")
     UNION_TYPES.add(cls)
+    _clear_decoders()
     return cls
 
 
 __all__ = (
+    "CompactStruct",
     "FrozenStruct",
     "Struct",
     "field",
@@ -45,6 +45,26 @@ def make_sync(func: Callable[..., Coroutine[Any, Any, Any]]) -> _SyncWrapper:
     return func
 
 
+async def amap(
+    func: Callable[[Any], Coroutine[Any, Any, Any]],
+    iterable: Iterable[Any],
+    limit: int,
+) -> list[Any]:
+    """Map async func over iterable, at most `limit` concurrently, results in order"""
+    items = list(iterable)
+    results: list[Any] = [None] * len(items)
+    pending = iter(enumerate(items))
+
+    async def worker() -> None:
+        for i, item in pending:
+            results[i] = await func(item)
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(min(limit, len(items))):
+            tg.start_soon(worker)
+    return results
+
+
 def joinmap(
     iterable: Iterable[Any], func: Callable[[Any], str] = str, sep: str = ", "
 ) -> str:
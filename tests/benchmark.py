@@ -0,0 +1,215 @@
+"""
+Benchmarks of serialize, Struct codecs and Dic conversion
+
+Run with `python -m tests.benchmark`, see `--help`. Results are operations per second
+by benchmark name, written as json. With `--compare` the run fails if throughput of
+any benchmark fell below the baseline by more than `--threshold`.
+
+Run outside pytest: typeguard instrumentation of zerolib would swamp the timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import operator
+import pathlib
+import sys
+import timeit
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import anyio
+import deepmerge
+
+from zerolib import Dic, DicPath, LazyDic, Struct, serialize
+
+SIZES = dict(small=10, large=1000)
+
+# minimum seconds spent timing each benchmark
+MIN_TIME = 0.2
+
+THRESHOLD = 0.1
+
+
+class Record(Struct):
+    name: str
+    path: anyio.Path | None = None
+    tags: set[str] = set()  # noqa: RUF012
+    values: list[int] = []  # noqa: RUF012
+    meta: Dic = Dic()
+
+
+def payloads(size: int) -> dict[str, Any]:
+    """Payload shapes of about `size` items"""
+    nested: dict[str, Any] = {}
+    node = nested
+    # Dic conversion and the std serializers recurse
+    for i in range(min(size, 100)):
+        node["value"] = i
+        node = node.setdefault("child", {})
+    return dict(
+        flat={f"key{i}": i for i in range(size)},
+        records=dict(
+            records=[
+                dict(name=f"name{i}", tags=[f"tag{i}"], values=list(range(10)))
+                for i in range(size)
+            ]
+        ),
+        nested=nested,
+    )
+
+
+def records(size: int, fmt: serialize.FormatType) -> list[Record]:
+    return [
+        Record(
+            f"name{i}",
+            # ext types only decode from msgpack
+            anyio.Path(f"/path/{i}") if fmt == "msgpack" else None,
+            tags={f"tag{i}"},
+            values=list(range(10)),
+            meta=Dic(a=i),
+        )
+        for i in range(size)
+    ]
+
+
+def benchmarks(sizes: dict[str, int]) -> dict[str, Callable[[], Any]]:
+    """Benchmark functions by name"""
+    funcs: dict[str, Callable[[], Any]] = {}
+    for size_name, size in sizes.items():
+        for shape, payload in payloads(size).items():
+            dic = Dic(payload)
+            funcs[f"dic.convert.{shape}.{size_name}"] = functools.partial(Dic, payload)
+            funcs[f"dic.convert_lazy.{shape}.{size_name}"] = functools.partial(
+                LazyDic, payload
+            )
+            funcs[f"dic.export.{shape}.{size_name}"] = dic.export
+            funcs[f"dic.sha256.{shape}.{size_name}"] = dic.sha256_hex
+            # merged into a fresh copy as both merge in place
+            funcs[f"dic.merge.{shape}.{size_name}"] = functools.partial(
+                lambda payload: Dic(payload).merge(payload), payload
+            )
+            funcs[f"dic.merge_deepmerge.{shape}.{size_name}"] = functools.partial(
+                lambda payload: deepmerge.always_merger.merge(Dic(payload), payload),
+                payload,
+            )
+            for fmt in serialize.SERIALIZERS:
+                for engine in serialize.ENGINE_CHOICES:
+                    name = f"{shape}.{size_name}.{fmt}.{engine}"
+                    dumped = serialize.dumps(dic, fmt, engine=engine)
+                    funcs[f"serialize.dumps.{name}"] = functools.partial(
+                        serialize.dumps, dic, fmt, engine=engine
+                    )
+                    funcs[f"serialize.loads.{name}"] = functools.partial(
+                        serialize.loads, dumped, fmt, engine=engine
+                    )
+        nested = Dic(payloads(size)["nested"])
+        path = ".".join(["child"] * (min(size, 100) - 1) + ["value"])
+        funcs[f"dic.getattr.nested.{size_name}"] = functools.partial(
+            operator.attrgetter(path), nested
+        )
+        funcs[f"dic.get_path.nested.{size_name}"] = functools.partial(
+            DicPath(path).get, nested
+        )
+        dics = [Dic(record) for record in payloads(size)["records"]["records"]][::-1]
+        funcs[f"dic.sorted.{size_name}"] = functools.partial(sorted, dics)
+        funcs[f"dic.sorted_key.{size_name}"] = functools.partial(
+            sorted, dics, key=Dic.sort_key
+        )
+        for fmt in serialize.SERIALIZERS:
+            name = f"{size_name}.{fmt}"
+            objs = records(size, fmt)
+            encoded = [obj.encode(fmt) for obj in objs]
+            funcs[f"struct.encode.{name}"] = functools.partial(
+                lambda objs, fmt: [obj.encode(fmt) for obj in objs], objs, fmt
+            )
+            funcs[f"serialize.dumps.struct.{name}"] = functools.partial(
+                lambda objs, fmt: [serialize.dumps(obj, fmt) for obj in objs],
+                objs,
+                fmt,
+            )
+            funcs[f"struct.decode.{name}"] = functools.partial(
+                lambda encoded, fmt: [Record.decode(e, fmt) for e in encoded],
+                encoded,
+                fmt,
+            )
+    return funcs
+
+
+def measure(func: Callable[[], Any], min_time: float = MIN_TIME) -> float:
+    """Operations per second, best of three runs of at least `min_time` seconds"""
+    timer = timeit.Timer(func)
+    number = 1
+    while (elapsed := timer.timeit(number)) < min_time / 3:
+        number *= 2
+    elapsed = min(elapsed, *timer.repeat(2, number))
+    return number / elapsed
+
+
+def run(
+    sizes: dict[str, int], pattern: str = "", min_time: float = MIN_TIME
+) -> dict[str, float]:
+    return {
+        name: measure(func, min_time)
+        for name, func in benchmarks(sizes).items()
+        if pattern in name
+    }
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float
+) -> list[str]:
+    """Benchmarks slower than baseline by more than `threshold`, as a fraction"""
+    return [
+        f"{name}: {results[name]:.1f}/s < {ops:.1f}/s ({results[name] / ops - 1:+.1%})"
+        for name, ops in baseline.items()
+        if name in results and results[name] < ops * (1 - threshold)
+    ]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.benchmark", description=__doc__.split("\n")[1]
+    )
+    parser.add_argument(
+        "-k", "--pattern", default="", help="only benchmarks containing this"
+    )
+    parser.add_argument(
+        "--size",
+        action="append",
+        choices=SIZES,
+        help="payload sizes (default: all)",
+    )
+    parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="write results")
+    parser.add_argument(
+        "-c", "--compare", type=pathlib.Path, help="baseline results to compare"
+    )
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help=f"allowed slowdown as a fraction (default: {THRESHOLD})",
+    )
+    args = parser.parse_args(argv)
+    sizes = {name: SIZES[name] for name in args.size or SIZES}
+    results = run(sizes, args.pattern, args.min_time)
+    for name, ops in results.items():
+        print(f"{name:<50} {ops:>14.1f}/s")  # noqa: T201
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.compare:
+        regressions = compare(
+            results, json.loads(args.compare.read_text()), args.threshold
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)  # noqa: T201
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
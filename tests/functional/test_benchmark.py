@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import itertools
+import json
+import pathlib
+
+import pytest
+
+from zerolib import serialize
+
+from .. import benchmark
+
+
+def test_benchmark(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    output = tmp_path / "results.json"
+    args = ["-k", "struct.decode", "--size", "small", "--min-time", "0.001"]
+    assert benchmark.main([*args, "-o", str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert list(results) == [
+        f"struct.decode.small.{fmt}" for fmt in ("msgpack", "json", "yaml")
+    ]
+    assert all(ops > 0 for ops in results.values())
+    assert benchmark.main([*args, "-c", str(output), "-t", "1"]) == 0
+    output.write_text(json.dumps(dict.fromkeys(results, float("inf"))))
+    assert benchmark.main([*args, "-c", str(output)]) == 1
+    assert capsys.readouterr().err.count("REGRESSION") == len(results)
+
+
+def test_benchmark_payloads() -> None:
+    funcs = benchmark.benchmarks(dict(tiny=1))
+    assert {name.rsplit(".", 1)[0] for name in funcs if name.startswith("dic.")} == {
+        f"dic.{group}.{shape}"
+        for group in (
+            "convert",
+            "convert_lazy",
+            "export",
+            "sha256",
+            "merge",
+            "merge_deepmerge",
+        )
+        for shape in ("flat", "nested", "records")
+    } | {
+        "dic.getattr.nested",
+        "dic.get_path.nested",
+        "dic.sorted",
+        "dic.sorted_key",
+    }
+    assert {
+        tuple(name.split(".")[-2:])
+        for name in funcs
+        if name.startswith("serialize.loads.")
+    } == set(itertools.product(serialize.SERIALIZERS, serialize.ENGINE_CHOICES))
+    for group in ("struct.encode", "serialize.dumps.struct", "struct.decode"):
+        assert {
+            name.rsplit(".", 1)[1] for name in funcs if name.startswith(f"{group}.")
+        } == set(serialize.SERIALIZERS)
+    for func in funcs.values():
+        func()
+
+
+def test_measure() -> None:
+    assert benchmark.measure(lambda: None, 0.001) > 0
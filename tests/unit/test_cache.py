@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from zerolib.cache import LRUCache
+
+
+def test_repr() -> None:
+    assert (
+        repr(LRUCache()) == "<LRUCache entries=0 bytes=0 hits=0 misses=0 evictions=0>"
+    )
+
+
+def test_get_put_pop() -> None:
+    lru = LRUCache()
+    assert lru.get("a") is None
+    assert lru.misses == 1
+    lru.put("a", 1, 10)
+    assert "a" in lru
+    assert lru.get("a") == 1
+    assert lru.hits == 1
+    lru.put("a", 2, 5)
+    assert len(lru) == 1
+    assert lru.nbytes == 5
+    assert lru.pop("a") == 2
+    assert lru.pop("a", False) is False
+    assert lru.nbytes == 0
+
+
+def test_evict_entries() -> None:
+    lru = LRUCache(max_entries=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    # a is now most recently used
+    lru.get("a")
+    lru.put("c", 3)
+    assert "b" not in lru
+    assert list(map(lru.get, "ac")) == [1, 3]
+    assert lru.evictions == 1
+
+
+def test_evict_bytes() -> None:
+    lru = LRUCache(max_bytes=10)
+    lru.put("a", 1, 6)
+    lru.put("b", 2, 6)
+    assert "a" not in lru
+    assert lru.nbytes == 6
+    # too big to cache
+    lru.put("c", 3, 11)
+    assert "c" not in lru
+    assert lru.evictions == 1
+    lru.clear()
+    assert not len(lru)
+    assert lru.nbytes == 0
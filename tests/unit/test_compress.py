@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import pytest
+
+from zerolib import compress
+
+DATA = b"abc" * 100
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+@pytest.mark.parametrize("level", [None, 1])
+def test_roundtrip(codec: compress.CodecType, level: int | None) -> None:
+    compression = compress.Compression(codec, level)
+    data = compression.compress(DATA)
+    assert data[0] == compress.MAGIC
+    assert len(data) < len(DATA)
+    assert compression.decompress(data) == DATA
+    assert compress.decompress(memoryview(data)) == DATA
+
+
+def test_uncompressed() -> None:
+    assert compress.decompress(b"") == b""
+    view = memoryview(DATA)
+    assert compress.decompress(view) is view
+
+
+def test_dict() -> None:
+    samples = [b"common prefix %d" % i for i in range(10)]
+    compression = compress.Compression().train(samples, size=64)
+    assert compression.zdict is not None
+    assert len(compression.zdict) == 64
+    record = b"common prefix 11"
+    data = compression.compress(record)
+    assert len(data) < len(compress.Compression().compress(record))
+    assert compression.decompress(data) == record
+    with pytest.raises(ValueError, match="dictionary"):
+        compress.decompress(data)
+
+
+def test_dict_unsupported() -> None:
+    with pytest.raises(ValueError, match="dictionary"):
+        compress.Compression("lzma", zdict=b"x")
+    with pytest.raises(ValueError, match="dictionary"):
+        compress.Compression("lzma").train([b"x"])
+
+
+def test_unknown_codec() -> None:
+    with pytest.raises(ValueError, match="unknown codec"):
+        compress.decompress(bytes((compress.MAGIC, 0x7F)))
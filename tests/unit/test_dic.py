@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import copy
 import datetime
+import hashlib
+import pickle
+import sys
+from collections.abc import Callable
+from typing import Any
 
 import pytest
 
-from zerolib import Dic
+from zerolib import Dic, DicPath, FrozenDic, LazyDic, dic
+from zerolib.cache import LRUCache
 
 
 def test_setattr() -> None:
@@ -43,6 +50,7 @@ def test_repr() -> None:
 def test_hash() -> None:
     d = Dic(a=1, b=[1], c={1}, d=(1,))
     assert isinstance(hash(d), int)
+    assert hash(Dic(a=None)) == hash(FrozenDic(a=None))
 
 
 def test_sha256_hex() -> None:
@@ -53,10 +61,89 @@ def test_sha256_hex() -> None:
     )
 
 
+def test_sha256_hex_canonical() -> None:
+    d = Dic(
+        a=1,
+        b=[1, "x", dict(c=0)],
+        c={3, 1},
+        d=(),
+        e=[()],
+        f=dict(z=1.5, y=Dic(), x="it's"),
+        g=datetime.date(2020, 1, 1),
+    )
+    canonical = str(d._to_tuple())
+    assert "".join(d._canonical_chunks(1)) == canonical
+    assert d.sha256_hex() == hashlib.sha256(canonical.encode()).hexdigest()
+    # stored digests depend on this
+    assert (
+        d.sha256_hex()
+        == "ee683feadb4ae0de2273e655844ec3ac9ee66c23b7a583b2f74bc0048f8e86f2"
+    )
+    # a frozenset is a leaf, unlike the sets a FrozenDic freezes
+    frozen = Dic(c=frozenset({1, 2}))
+    assert (
+        frozen.sha256_hex()
+        == frozen.freeze().sha256_hex()
+        == "463f5c0a88cb104d6a7184adfdd45107cb6fa52fefc360f21ad6f64fc4a0fbd6"
+    )
+    assert Dic(c={2, 1}).freeze().sha256_hex() == Dic(c={1, 2}).sha256_hex()
+
+
+def test_sha256_hex_memo(monkeypatch: pytest.MonkeyPatch) -> None:
+    memo = LRUCache(max_bytes=16)
+    monkeypatch.setattr(dic, "SHA256_MEMO", memo)
+    frozen = FrozenDic(a=1)
+    digest = frozen.sha256_hex()
+    assert digest == Dic(a=1).sha256_hex()
+    assert FrozenDic(a=1).sha256_hex() == digest
+    assert (memo.hits, memo.misses) == (1, 1)
+    # larger than the memo
+    FrozenDic(a="a" * 16).sha256_hex()
+    assert len(memo) == 1
+
+
+def test_sha256_hex_memo_equal(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(dic, "SHA256_MEMO", LRUCache())
+    values = [1, 1.0, True]
+    # equal and of equal hash, with different canonical text
+    assert FrozenDic(x=1) == FrozenDic(x=1.0) == FrozenDic(x=True)
+    digests = [FrozenDic(x=value).sha256_hex() for value in values]
+    assert digests == [Dic(x=value).sha256_hex() for value in values]
+    assert len(set(digests)) == len(values)
+
+
 def test_order() -> None:
     d = Dic(a=1)
     d2 = Dic(a=2)
     assert sorted((d2, d)) == [d, d2]
+    assert sorted((d2, d), key=Dic.sort_key) == [d, d2]
+    assert d < FrozenDic(d2)
+    assert not d2 < d
+    assert d < [1]
+
+
+def test_sort_key() -> None:
+    d = Dic(a=dict(b=[1, "x"], c={2, 1}), d=None)
+    assert d.sort_key() == str(d._to_tuple())
+    frozen = d.freeze()
+    assert frozen.sort_key() == d.sort_key()
+    assert frozen.sort_key() is frozen.sort_key()
+    dics = [Dic(a=i % 7, b=[i]) for i in range(20)]
+    assert sorted(dics, key=Dic.sort_key) == sorted(dics)
+
+
+@pytest.mark.parametrize("size", [1, 3, dic.SORT_CHUNK_SIZE, 1 << 10])
+def test_lt_chunks(size: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(dic, "SORT_CHUNK_SIZE", size)
+    dics = [
+        Dic(a="x" * i, b=[i % 3, dict(c=i % 2)]) if i % 4 else Dic(a="x" * i)
+        for i in range(12)
+    ]
+    others = [*dics, *(d.freeze() for d in dics[::3]), dict(a="x"), {}]
+    for d in dics:
+        for other in others:
+            assert (d < other) is (d.sort_key() < d._sort_key(other))
+    assert not Dic(a=1) < Dic(a=1)
 
 
 def test_convert() -> None:
@@ -87,6 +174,102 @@ def test_merge() -> None:
     d.merge(dict(b=dict(c=2)))
     assert isinstance(d.b, Dic)
     assert d.b.c == 2
+    assert d.merge(dict(b=dict(d=[dict(e=1)]), f=dict())) is d
+    assert isinstance(d.b.d[0], Dic)
+    assert isinstance(d.f, Dic)
+    # not converted on assignment
+    d["g"] = dict(h=1)
+    d.merge(dict(g=dict(i=1)))
+    assert d.g == Dic(h=1, i=1)
+    assert isinstance(d.g, Dic)
+
+
+@pytest.mark.parametrize(
+    ("strategy", "expected"),
+    [
+        ("append", dict(a=[1, 2, 2, 3], b={1, 2, 3}, c=(3,))),
+        ("union", dict(a=[1, 2, 3], b={1, 2, 3}, c=(3,))),
+        ("override", dict(a=[2, 3], b={2, 3}, c=(3,))),
+    ],
+)
+def test_merge_strategy(strategy: dic.MergeType, expected: dict[str, Any]) -> None:
+    d = Dic(a=[1, 2], b={1, 2}, c=(1, 2))
+    other = dict(a=[2, 3], b={2, 3}, c=(3,))
+    assert d.merged(other, strategy) == expected
+    assert d.merge(other, strategy) == expected
+
+
+def test_merge_conflict() -> None:
+    d = Dic(a=dict(b=1), c=[1], d=None)
+    assert d.merged(dict(a=dict(b=[1]), c={2}, d=1)) == dict(a=dict(b=[1]), c={2}, d=1)
+    with pytest.raises(TypeError, match=r"^a\.b: cannot merge list into int$"):
+        d.merge(dict(a=dict(b=[1])), strict=True)
+    with pytest.raises(TypeError, match="cannot merge int into Dic"):
+        d.merge(dict(a=1), strict=True)
+    d.merge(dict(a=dict(b=2), c=[2], d=1, e=1), strict=True)
+    assert d == dict(a=dict(b=2), c=[1, 2], d=1, e=1)
+
+
+def test_merge_copy() -> None:
+    d = Dic(a=dict(b=1), c=dict(d=1), e=[1])
+    merged = d | dict(a=dict(b=2), e=[2])
+    assert type(merged) is Dic
+    assert merged == dict(a=dict(b=2), c=dict(d=1), e=[1, 2])
+    assert d == dict(a=dict(b=1), c=dict(d=1), e=[1])
+    # unchanged subtrees are shared
+    assert merged.c is d.c
+    d |= dict(a=dict(b=2))
+    assert d.a.b == 2
+
+
+def test_merge_frozen() -> None:
+    frozen = FrozenDic(a=dict(b=[1]))
+    merged = frozen | dict(a=dict(b=[2]))
+    assert isinstance(merged, FrozenDic)
+    assert merged == dict(a=dict(b=(1, 2)))
+    d = Dic(a=frozen)
+    d.merge(dict(a=dict(c=1)))
+    assert isinstance(d.a, FrozenDic)
+    assert d.a == dict(a=dict(b=(1,)), c=1)
+    assert frozen == dict(a=dict(b=(1,)))
+
+
+def test_merge_lazy() -> None:
+    raw = dict(a=dict(b=dict(c=1)))
+    lazy = LazyDic(raw)
+    merged = lazy | dict(a=dict(b=dict(d=1)))
+    assert isinstance(merged, LazyDic)
+    assert isinstance(merged.a.b, LazyDic)
+    assert merged == dict(a=dict(b=dict(c=1, d=1)))
+    lazy.merge(dict(a=dict(b=dict(d=2))))
+    assert lazy == dict(a=dict(b=dict(c=1, d=2)))
+    assert raw == dict(a=dict(b=dict(c=1)))
+
+
+def test_merge_deep() -> None:
+    d = node = Dic()
+    other: dict[str, Any] = {}
+    xnode = other
+    for _ in range(sys.getrecursionlimit() * 2):
+        node.a = Dic()
+        node = node.a
+        xnode["a"] = {}
+        xnode = xnode["a"]
+    xnode["b"] = 1
+    d.merge(other)
+    leaf = d
+    while "a" in leaf:
+        leaf = leaf.a
+    assert leaf == dict(b=1)
+
+
+def test_and() -> None:
+    d = Dic(a=1, b=dict(c=1, d=2), e=dict(f=1), g=[1], h=2)
+    assert d & dict(a=1, b=dict(c=1, d=3), e=dict(f=2), g=[1], h=3, i=1) == dict(
+        a=1, b=dict(c=1), g=[1]
+    )
+    assert isinstance(FrozenDic(d) & d, FrozenDic)
+    assert not d & {}
 
 
 def test_sorted() -> None:
@@ -121,3 +304,202 @@ def test_export() -> None:
         a=dict(a=now), b=[dict(a=1, b=[1], c=[1]), (1,), 1], c=["a", 1]
     )
     assert d.export(stringify=True)["a"] == dict(a=str(now))
+
+
+def test_export_clean() -> None:
+    d = Dic(a=Dic(b=None, c=[Dic(d="")]), e=[None, "", [], 1, {2, 1}], f=(0,))
+    assert d.export() == dict(e=[1, [1, 2]], f=[0])
+
+
+def test_export_deep() -> None:
+    d = node = Dic()
+    for _ in range(sys.getrecursionlimit() * 2):
+        node.a = Dic()
+        node = node.a
+    node.a = 1
+    depth = 0
+    export: Any = d.export()
+    while isinstance(export, dict):
+        export = export["a"]
+        depth += 1
+    assert export == 1
+    assert depth == sys.getrecursionlimit() * 2 + 1
+
+
+def test_frozen() -> None:
+    d = Dic(a=dict(b=[1, dict(c=1)], c={1, 2}), d=(1,))
+    frozen = d.freeze()
+    assert isinstance(frozen, FrozenDic)
+    assert frozen.freeze() is frozen
+    assert isinstance(frozen.a, FrozenDic)
+    assert frozen.a.b == (1, FrozenDic(c=1))
+    assert frozen.a.c == frozenset((1, 2))
+    assert hash(frozen) == hash(d)
+    assert frozen.sha256_hex() == d.sha256_hex()
+    assert frozen.export() == d.export()
+    assert {frozen: 1}[FrozenDic(d)] == 1
+    assert len({frozen, d.freeze()}) == 1
+    # equal as hashed, though lists are frozen to tuples
+    for other in (d, dict(d)):
+        assert frozen == other
+        assert other == frozen
+        assert not frozen != other  # noqa: SIM202
+    lookup: dict[Dic, int] = {frozen: 1}
+    assert lookup[d] == 1
+    assert frozen != d | dict(d=[2])
+    assert frozen != 1
+    thawed = frozen.thaw()
+    assert type(thawed) is Dic
+    assert type(thawed.a) is Dic
+    assert thawed.a.c == {1, 2}
+    assert thawed == d | dict(d=[1])
+    for frozen_copy in (copy.copy(frozen), pickle.loads(pickle.dumps(frozen))):  # noqa: S301
+        assert frozen_copy == frozen
+        assert isinstance(frozen_copy.a, FrozenDic)
+
+
+def test_frozen_immutable() -> None:
+    frozen = FrozenDic(a=1)
+    mutations: tuple[Callable[[], object], ...] = (
+        lambda: frozen.__setitem__("a", 2),
+        lambda: frozen.__delitem__("a"),
+        lambda: setattr(frozen, "a", 2),
+        lambda: delattr(frozen, "a"),
+        lambda: frozen.update(a=2),
+        lambda: frozen.setdefault("b", 2),
+        lambda: frozen.pop("a"),
+        lambda: frozen.popitem(),
+        lambda: frozen.clear(),
+        lambda: frozen.merge(dict(a=2)),
+    )
+    for mutate in mutations:
+        with pytest.raises(TypeError, match="immutable"):
+            mutate()
+    with pytest.raises(TypeError, match="immutable"):
+        frozen |= dict(a=2)
+    assert frozen == dict(a=1)
+
+
+def test_frozen_clean() -> None:
+    frozen = FrozenDic(a=1, b=dict(c=None), d=[dict(a="")])
+    assert frozen.clean() == dict(a=1)
+    assert isinstance(frozen.clean(), FrozenDic)
+    assert type(frozen.clean(dict)) is dict
+
+
+def test_lazy() -> None:
+    raw: dict[str, Any] = dict(
+        a=dict(b=[dict(c=1)], s={1}), d=[1, dict(e=2)], f=1, g=None
+    )
+    d = Dic(raw)
+    lazy = LazyDic(raw)
+    # nothing converted yet
+    assert type(dict.__getitem__(lazy, "a")) is dict
+    assert lazy == d
+    assert hash(lazy) == hash(d)
+    assert lazy.sha256_hex() == d.sha256_hex()
+    assert lazy.export() == d.export()
+    assert lazy.clean() == d.clean()
+    assert not sorted((lazy, d)) < [d]
+    assert isinstance(lazy.a, LazyDic)
+    assert lazy.a is lazy["a"]
+    assert isinstance(lazy.a.b[0], LazyDic)
+    assert lazy.a.b[0].c == 1
+    assert raw["a"]["b"][0] == dict(c=1)
+    assert type(raw["a"]["b"][0]) is dict
+    lazy.a.x = 1
+    assert lazy.a.x == 1
+    assert "x" not in raw["a"]
+    assert pickle.loads(pickle.dumps(lazy)) == lazy  # noqa: S301
+
+
+def test_lazy_methods() -> None:
+    lazy = LazyDic(a=dict(b=1), c=[dict(d=1)], e=dict())
+    assert isinstance(lazy.get("a"), LazyDic)
+    assert lazy.get("x", 1) == 1
+    assert isinstance(lazy.setdefault("e", 1), LazyDic)
+    assert isinstance(lazy.setdefault("f", dict()), LazyDic)
+    assert isinstance(lazy.pop("c")[0], LazyDic)
+    assert lazy.pop("c", None) is None
+    with pytest.raises(KeyError):
+        lazy.pop("c")
+    lazy["g"] = dict()
+    del lazy["g"]
+    assert "g" not in lazy
+    lazy.update(g=dict(h=1))
+    assert isinstance(lazy.g, LazyDic)
+    lazy.update(i=[dict()])
+    key, value = lazy.popitem()
+    assert key == "i"
+    assert isinstance(value[0], LazyDic)
+    key, value = lazy.popitem()
+    assert key == "g"
+    assert isinstance(value, LazyDic)
+    lazy["j"] = 1
+    assert lazy.popitem() == ("j", 1)
+    lazy.clear()
+    assert not lazy
+    assert not lazy._pending
+    with pytest.raises(AttributeError):
+        lazy.a  # noqa: B018
+
+
+@pytest.mark.parametrize(
+    ("path", "steps"),
+    [
+        ("a", ("a",)),
+        ("a.b[0].c", ("a", "b", 0, "c")),
+        ("a[-1][0]", ("a", -1, 0)),
+        ("[0].a b", (0, "a b")),
+    ],
+)
+def test_path(path: str, steps: tuple[str | int, ...]) -> None:
+    parsed = DicPath(path)
+    assert parsed == steps
+    assert str(parsed) == path
+    assert repr(parsed) == f"DicPath({path!r})"
+    assert DicPath(steps) == parsed
+
+
+@pytest.mark.parametrize("path", ["", ".a", "a.", "a..b", "a[", "a[x]", "a]", "a[0]b"])
+def test_path_invalid(path: str) -> None:
+    with pytest.raises(ValueError, match="invalid path"):
+        DicPath(path)
+
+
+def test_get_path() -> None:
+    d = Dic(logger=dict(handlers=[dict(format="x")], level=1))
+    assert d.get_path("logger.handlers[0].format") == "x"
+    assert d.get_path("logger.handlers[-1]") == dict(format="x")
+    assert d.get_path("logger.handlers[1]") is None
+    assert d.get_path("logger.level.x", 1) == 1
+    path = DicPath("logger.level")
+    assert d.get_path(path) == 1
+    assert path.get(Dic(logger=dict(level=2))) == 2
+    assert LazyDic(d).get_path("logger.handlers[0]") == dict(format="x")
+
+
+def test_set_path() -> None:
+    d = Dic(a=[dict()])
+    d.set_path("a[0].b", dict(c=1))
+    assert isinstance(d.a[0].b, Dic)
+    d.set_path("d.e.f", 1)
+    assert d.d.e.f == 1
+    assert isinstance(d.d.e, Dic)
+    with pytest.raises(IndexError):
+        d.set_path("a[1].b", 1)
+    with pytest.raises(TypeError):
+        FrozenDic().set_path("a", 1)
+    lazy = LazyDic()
+    lazy.set_path("a.b", 1)
+    assert isinstance(lazy.a, LazyDic)
+
+
+def test_del_path() -> None:
+    d = Dic(a=dict(b=[1, 2]))
+    d.del_path("a.b[0]")
+    assert d.a.b == [2]
+    d.del_path("a.b")
+    assert d == dict(a=dict())
+    with pytest.raises(KeyError):
+        d.del_path("a.b")
@@ -2,15 +2,21 @@ from __future__ import annotations
 
 import functools
 import io
+import json
+import pathlib
 from typing import Any
 
+import anyio
+import msgpack
+import msgspec
 import pytest
 
-from zerolib import Dic, serialize
+from zerolib import Dic, LazyDic, serialize
 
-from .type.test_struct import Impl
+from .type.test_struct import Impl, Impl2
 
 
+@pytest.mark.parametrize("engine", serialize.ENGINE_CHOICES)
 @pytest.mark.parametrize(
     ("fmt", "obj"),
     functools.reduce(
@@ -22,18 +28,153 @@ from .type.test_struct import Impl
         [],
     ),
 )
-def test_dump_load(fmt: str, obj: Any) -> None:
+def test_dump_load(
+    fmt: serialize.FormatType, obj: Any, engine: serialize.EngineType
+) -> None:
     stream = (io.BytesIO if fmt == "msgpack" else io.StringIO)()
     if fmt == "msgpack":
         # special case: see serialize.dump
         stream.buffer = stream
-    serialize.dump(obj, file=stream, fmt=fmt)
+    serialize.dump(obj, file=stream, fmt=fmt, engine=engine)
     stream.seek(0)
-    assert serialize.load(file=stream, fmt=fmt) == obj
-    assert serialize.loads(serialize.dumps(obj)) == obj
+    assert serialize.load(file=stream, fmt=fmt, engine=engine) == obj
+    assert serialize.loads(serialize.dumps(obj, engine=engine), engine=engine) == obj
+    assert serialize.dumps(obj, fmt, engine=engine) == serialize.dumps(obj, fmt)
 
 
-def test_dump_struct() -> None:
-    obj = Impl()
-    dump = serialize.dumps(obj, fmt="yaml")
-    assert dump == "mstr: a\nmint: 0\n_mbool: false"
+@pytest.mark.parametrize("engine", serialize.ENGINE_CHOICES)
+def test_load_lazy(engine: serialize.EngineType) -> None:
+    obj = Dic(a=dict(b=[dict(c=1)]))
+    dump = serialize.dumps(obj, "json", engine=engine)
+    loaded = serialize.loads(dump, "json", engine=engine, lazy=True)
+    assert isinstance(loaded, LazyDic)
+    assert loaded == obj
+    assert isinstance(loaded.a.b[0], LazyDic)
+    assert serialize.load(io.StringIO(dump), "json", engine=engine, lazy=True) == obj
+
+
+@pytest.mark.parametrize("engine", serialize.ENGINE_CHOICES)
+@pytest.mark.parametrize("fmt", serialize.SERIALIZERS)
+def test_dump_struct(fmt: serialize.FormatType, engine: serialize.EngineType) -> None:
+    # ext types are only decoded from msgpack
+    obj = Impl2.factory("b", path=anyio.Path(".")) if fmt == "msgpack" else Impl("b")
+    dump = serialize.dumps(obj, fmt, engine=engine)
+    assert dump == serialize.dumps(obj, fmt)
+    encoded = dump if isinstance(dump, bytes) else dump.encode()
+    assert type(obj).decode(encoded, fmt) == obj
+    stream = (io.BytesIO if fmt == "msgpack" else io.StringIO)()
+    serialize.dump(obj, stream, fmt, engine)
+    assert stream.getvalue().strip() == dump
+
+
+def test_dump_struct_options() -> None:
+    dump = serialize.dumps(Impl(), "yaml")
+    assert dump == "type: Impl"
+    assert serialize.dumps(Impl(), "yaml", stringify=True) == dump
+    # options are passed to the engine's dumper
+    assert serialize.dumps(Impl(), "json", indent=4) == '{\n    "type": "Impl"\n}'
+    assert serialize.dumps(Impl(), "msgpack", use_bin_type=True) == Impl().encode()
+    # by way of Dic.export
+    obj = Impl(mset={1})
+    assert serialize.dumps(obj, "yaml", stringify=False) == (
+        serialize.dumps(obj.asdict(), "yaml", stringify=False)
+    )
+    stream = io.StringIO()
+    serialize.dump(obj, stream, "json", stringify=False)
+    assert json.loads(stream.getvalue()) == obj.asdict().export()
+
+
+@pytest.mark.parametrize("engine", serialize.ENGINE_CHOICES)
+@pytest.mark.parametrize("fmt", serialize.SERIALIZERS)
+def test_dump_struct_order(
+    fmt: serialize.FormatType, engine: serialize.EngineType
+) -> None:
+    # 8 and 16 collide, so iterate in insertion order
+    obj = Impl(mdict=Dic(b=1, a=2), mset={16, 8})
+    other = Impl(mdict=Dic(a=2, b=1), mset={8, 16})
+    assert list(obj.mset) != list(other.mset)
+    assert serialize.dumps(obj, fmt, engine=engine) == (
+        serialize.dumps(other, fmt, engine=engine)
+    )
+
+
+def test_dump_msgspec_struct() -> None:
+    class Plain(msgspec.Struct):
+        a: int = 1
+
+    assert serialize.dumps(Plain(), "json") == '{\n  "a": 1\n}'
+
+
+def test_dump_msgspec_default() -> None:
+    obj = Dic(a=pathlib.PurePath("x"))
+    assert serialize.dumps(obj, "json", engine="msgspec", stringify=False) == (
+        serialize.dumps(obj, "json", stringify=False)
+    )
+
+
+@pytest.mark.parametrize(
+    ("fmt", "data"),
+    [
+        ("json", ' [1, {"a": [2, 3]} , "é", 12345 ] '),
+        ("json", '1\n{"a": [2, 3]}\n"é" 12345'),
+        ("yaml", "1\n---\na: [2, 3]\n---\né\n---\n12345\n"),
+        ("msgpack", b"".join(map(msgpack.packb, (1, {"a": [2, 3]}, "é", 12345)))),
+    ],
+)
+def test_iterload(
+    fmt: serialize.FormatType, data: str | bytes, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(serialize, "ITERLOAD_READ_SIZE", 3)
+    items = serialize.iterload(
+        io.BytesIO(data.encode() if isinstance(data, str) else data), fmt
+    )
+    assert next(items) == 1
+    assert list(items) == [Dic(a=[2, 3]), "é", 12345]
+
+
+@pytest.mark.parametrize("data", ["", "[]", " [ ] "])
+def test_iterload_json_empty(data: str) -> None:
+    assert list(serialize.iterload(io.StringIO(data), "json")) == []
+
+
+@pytest.mark.parametrize("data", ["[1 2]", "[1", "[1,", "[1] 2", '{"a":'])
+def test_iterload_json_invalid(data: str) -> None:
+    with pytest.raises(json.JSONDecodeError):
+        list(serialize.iterload(io.StringIO(data), "json"))
+
+
+@pytest.mark.parametrize("data", ["[1, x, ", '{"a": 1 "b": ', '[1, "a\n'])
+def test_iterload_json_invalid_early(
+    data: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(serialize, "ITERLOAD_READ_SIZE", 16)
+    file = io.StringIO(data + " 1," * (1 << 16))
+    with pytest.raises(json.JSONDecodeError):
+        list(serialize.iterload(file, "json"))
+    # raised without reading the tail
+    assert file.tell() < 64
+
+
+@pytest.mark.parametrize("fmt", serialize.SERIALIZERS)
+@pytest.mark.parametrize("threshold", [0, 1 << 30])
+async def test_dump_load_async(
+    fmt: serialize.FormatType,
+    threshold: int,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(serialize, "ASYNC_THREAD_THRESHOLD", threshold)
+    monkeypatch.setattr(serialize, "ASYNC_PROCESS_THRESHOLD", threshold)
+    obj = Dic(a=[1, Dic(b="c")])
+    path = tmp_path / f"obj.{fmt}"
+    await serialize.dump_async(obj, path, fmt)
+    with path.open("rb") as file:
+        assert serialize.load(file, fmt) == obj
+    assert await serialize.load_async(path, fmt) == obj
+    struct = Impl("b", mset={1})
+    await serialize.dump_async(struct, path, fmt)
+    assert Impl.decode(path.read_bytes(), fmt) == struct
+
+
+def test_dumps_msgpack_whitespace() -> None:
+    assert serialize.loads(serialize.dumps(" ", "msgpack"), "msgpack") == " "
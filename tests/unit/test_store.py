@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import sys
+import textwrap
+import time
+import zlib
+from collections.abc import AsyncGenerator, Callable
+
+import anyio
+import pytest
+
+from zerolib import Context, store
+
+from .type.test_struct import Impl, Impl2
+
+
+@pytest.fixture(
+    params=(
+        store.FileStore,
+        store.BlobStore,
+        store.SqliteStore,
+        lambda: store.IndexedStore(store.FileStore()),
+        lambda: store.IndexedStore(store.SqliteStore()),
+    ),
+    ids=("file", "blob", "sqlite", "indexed-file", "indexed-sqlite"),
+)
+async def db(request: pytest.FixtureRequest) -> AsyncGenerator[store.Store, None]:
+    db = request.param()
+    yield db
+    await db.close()
+
+
+def test_repr() -> None:
+    assert repr(store.FileStore()) == "<FileStore>"
+    assert repr(store.IndexedStore(store.FileStore())) == "<IndexedStore <FileStore>>"
+
+
+async def test_store(db: store.Store, tmp_path: pathlib.Path) -> None:
+    path = anyio.Path(tmp_path) / "impl" / "a.msgpack"
+    assert await db.read(path) is None
+    await db.write(path, b"a")
+    assert await db.read(path) == b"a"
+    await db.write(path, b"b")
+    assert await db.read(path) == b"b"
+    await db.delete(path)
+    assert await db.read(path) is None
+    with pytest.raises(FileNotFoundError):
+        await db.delete(path)
+
+
+async def test_keys(db: store.Store, tmp_path: pathlib.Path) -> None:
+    path = anyio.Path(tmp_path) / "impl"
+    assert await db.keys(path) == []
+    assert not await db.exists(path / "a")
+    for key in "ba":
+        await db.write(path / key, b"")
+    assert await db.exists(path / "a")
+    assert await db.keys(path) == ["a", "b"]
+
+
+async def test_gc(db: store.Store, tmp_path: pathlib.Path) -> None:
+    path = anyio.Path(tmp_path)
+    await db.touch(path / "a")
+    for key in "abc":
+        await db.write(path / key, key.encode() * 2)
+        await anyio.sleep(0.01)
+    await db.touch(path / "a")
+    assert not (await db.gc(path)).entries
+    assert not (await db.gc(path, max_age=3600)).entries
+    # by access: b, c, a
+    stats = await db.gc(path, max_bytes=4)
+    assert stats.names == ["b"]
+    assert stats.nbytes == 2
+    # by write: a, c
+    assert (await db.gc(path, max_bytes=2, evict="ttl")).names == ["a"]
+    assert (await db.gc(path, max_age=0)).names == ["c"]
+    assert await db.keys(path) == []
+
+
+async def test_gc_lock(tmp_path: pathlib.Path) -> None:
+    db = store.FileStore()
+    path = anyio.Path(tmp_path) / "a"
+    await db.write(path, b"a")
+    async with anyio.create_task_group() as tg, db.lock(path):
+        tg.start_soon(db.gc, path.parent, 0)
+        await anyio.sleep(0.01)
+        assert await db.exists(path)
+    assert not await db.exists(path)
+    await db.close()
+
+
+def _backdate(*paths: anyio.Path) -> None:
+    then = time.time() - store.FileStore.TMP_MAX_AGE - 1
+    for path in paths:
+        os.utime(path, (then, then))
+
+
+@pytest.mark.parametrize(
+    "factory",
+    [store.FileStore, lambda: store.IndexedStore(store.FileStore())],
+    ids=["file", "indexed-file"],
+)
+async def test_gc_tmp(
+    factory: Callable[[], store.Store], tmp_path: pathlib.Path
+) -> None:
+    db = factory()
+    path = anyio.Path(tmp_path)
+    await db.write(path / "a", b"a")
+    # writers interrupted before rename, long ago and just now
+    await (path / ".b.old").write_bytes(b"bbb")
+    await (path / ".b.new").write_bytes(b"bbb")
+    _backdate(path / ".b.old", path / ".lock")
+    stats = await db.gc(path)
+    assert stats.names == []
+    assert stats.nbytes == 3
+    assert sorted([p.name async for p in path.iterdir()]) == [".b.new", ".lock", "a"]
+    assert (await db.gc(path / "missing")).nbytes == 0
+    await db.close()
+
+
+@pytest.mark.parametrize(
+    "factory",
+    [store.BlobStore, lambda: store.IndexedStore(store.BlobStore())],
+    ids=["blob", "indexed-blob"],
+)
+async def test_blob_gc_tmp(
+    factory: Callable[[], store.Store], tmp_path: pathlib.Path
+) -> None:
+    db = factory()
+    path = anyio.Path(tmp_path)
+    blobdir = path / store.BlobStore.BLOBDIR
+    await db.write(path / "a", b"a")
+    # a writer interrupted once linked, and one writing the blob
+    blob = blobdir / hashlib.sha256(b"bb").hexdigest()
+    await blob.write_bytes(b"bb")
+    await (path / ".b.0123").hardlink_to(blob)
+    await (blobdir / f".{blob.name}.0123").write_bytes(b"cccc")
+    _backdate(blob, blobdir / f".{blob.name}.0123")
+    stats = await db.gc(path)
+    assert stats.names == []
+    assert stats.nbytes == 2 + 4
+    assert [p.name async for p in blobdir.iterdir()] == [
+        hashlib.sha256(b"a").hexdigest()
+    ]
+    assert await db.read(path / "a") == b"a"
+    await db.close()
+
+
+async def test_discard(db: store.Store, tmp_path: pathlib.Path) -> None:
+    path = anyio.Path(tmp_path) / "a"
+    await db.discard(path, b"a")
+    await db.write(path, b"a")
+    await db.discard(path, b"b")
+    assert await db.read(path) == b"a"
+    await db.discard(path, b"a")
+    assert await db.read(path) is None
+
+
+async def test_file_atomic(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    db = store.FileStore()
+    path = anyio.Path(tmp_path) / "a"
+    await db.write(path, b"a")
+
+    class CustomError(Exception): ...
+
+    def _raiser(*_args: pathlib.Path) -> None:
+        raise CustomError
+
+    monkeypatch.setattr(pathlib.Path, "replace", _raiser)
+    with pytest.raises(CustomError):
+        await db.write(path, b"b")
+    assert await db.read(path) == b"a"
+    assert sorted([p.name async for p in path.parent.iterdir()]) == [
+        db.LOCKNAME,
+        "a",
+    ]
+    await db.close()
+
+
+@pytest.mark.parametrize(
+    ("fsync", "count"), tuple(zip(store.FSYNC_CHOICES, range(3), strict=True))
+)
+async def test_file_fsync(
+    fsync: store.FsyncType,
+    count: int,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[int] = []
+    monkeypatch.setattr(os, "fsync", calls.append)
+    db = store.FileStore(fsync)
+    await db.write(anyio.Path(tmp_path) / "a", b"a")
+    assert len(calls) == count
+    await db.close()
+
+
+async def test_file_mmap(tmp_path: pathlib.Path) -> None:
+    db = store.FileStore(mmap_threshold=2)
+    path = anyio.Path(tmp_path) / "a"
+    for data, cls in ((b"", bytes), (b"a", bytes), (b"ab", memoryview)):
+        await db.write(path, data)
+        read = await db.read(path)
+        assert isinstance(read, cls)
+        assert read == data
+    assert await db.read(path.with_name("b")) is None
+    await db.close()
+
+
+async def test_file_lock_tasks(tmp_path: pathlib.Path) -> None:
+    db = store.FileStore()
+    path = anyio.Path(tmp_path) / "a"
+    events = []
+
+    async def locker(name: str, path: anyio.Path) -> None:
+        async with db.lock(path):
+            events.append(f"{name}+")
+            await anyio.sleep(0.01)
+            events.append(f"{name}-")
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(locker, "a", path)
+        tg.start_soon(locker, "b", path)
+    assert events == ["a+", "a-", "b+", "b-"]
+    events.clear()
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(locker, "a", path)
+        tg.start_soon(locker, "c", path.with_name("c"))
+    # held at once
+    assert sorted(events[:2]) == ["a+", "c+"]
+    assert not db._locks
+    await db.close()
+
+
+async def test_file_lock_process(tmp_path: pathlib.Path) -> None:
+    db = store.FileStore()
+    path = anyio.Path(tmp_path) / "a"
+    script = textwrap.dedent(
+        f"""
+        import fcntl, os
+        fd = os.open({str(tmp_path / db.LOCKNAME)!r}, os.O_RDWR)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, {zlib.crc32(b"a")})
+        except OSError:
+            print("locked")
+        else:
+            print("free")
+        """
+    )
+    async with db.lock(path):
+        proc = await anyio.run_process([sys.executable, "-c", script])
+        assert proc.stdout == b"locked\n"
+    proc = await anyio.run_process([sys.executable, "-c", script])
+    assert proc.stdout == b"free\n"
+    await db.close()
+
+
+async def test_indexed(tmp_path: pathlib.Path) -> None:
+    backend = store.FileStore()
+    db = store.IndexedStore(backend)
+    path = anyio.Path(tmp_path) / "a"
+    await db.write(path, b"a")
+    # written behind the index
+    await backend.write(path.with_name("b"), b"b")
+    assert await db.read(path.with_name("b")) is None
+    assert await db.keys(path.parent) == ["a"]
+    db.refresh(path.parent)
+    assert await db.read(path.with_name("b")) == b"b"
+    async with db.lock(path):
+        await backend.delete(path)
+    db.refresh()
+    assert await db.keys(path.parent) == ["b"]
+    await db.close()
+
+
+async def test_indexed_load(tmp_path: pathlib.Path) -> None:
+    db = store.IndexedStore(store.FileStore())
+    path = anyio.Path(tmp_path)
+    async with anyio.create_task_group() as tg:
+        for _ in range(2):
+            tg.start_soon(db.keys, path)
+    assert list(db._index) == [path]
+    assert not db._loading
+
+
+async def test_blob(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    db = store.BlobStore()
+    path = anyio.Path(tmp_path)
+    blobdir = path / db.BLOBDIR
+
+    async def blobs() -> list[str]:
+        return sorted([p.name async for p in blobdir.iterdir()])
+
+    for key in "ab":
+        await db.write(path / key, b"x")
+    assert (await (path / "a").stat()).st_ino == (await (path / "b").stat()).st_ino
+    assert await blobs() == [hashlib.sha256(b"x").hexdigest()]
+    await db.write(path / "c", b"y")
+    assert len(await blobs()) == 2
+    # c is the last reference to y
+    await db.write(path / "c", b"x")
+    assert await blobs() == [hashlib.sha256(b"x").hexdigest()]
+    await db.delete(path / "a")
+    await db.delete(path / "b")
+    assert len(await blobs()) == 1
+    await db.delete(path / "c")
+    assert await blobs() == []
+    with pytest.raises(FileNotFoundError):
+        await db.delete(path / "c")
+    # the blob to unlink is found from the digest in the meta file
+    await db.write(path / "d", b"w")
+    with monkeypatch.context() as patch:
+        patch.setattr(pathlib.Path, "read_bytes", None)
+        await db.write(path / "d", b"v")
+    assert await blobs() == [hashlib.sha256(b"v").hexdigest()]
+    # or from the payload, with the digest of an interrupted write
+    await (path / db.METADIR / "d").write_text(hashlib.sha256(b"w").hexdigest())
+    await db.delete(path / "d")
+    assert await blobs() == []
+    # blob removed between existence check and link
+    hardlink_to = pathlib.Path.hardlink_to
+    calls = []
+
+    def _hardlink_to(self: pathlib.Path, target: pathlib.Path) -> None:
+        calls.append(target)
+        if len(calls) == 1:
+            target.unlink()
+        hardlink_to(self, target)
+
+    monkeypatch.setattr(pathlib.Path, "hardlink_to", _hardlink_to)
+    await db.write(path / "a", b"z")
+    assert await db.read(path / "a") == b"z"
+    assert len(calls) == 2
+    await db.close()
+
+
+@pytest.mark.parametrize(
+    "factory",
+    [store.BlobStore, lambda: store.IndexedStore(store.BlobStore())],
+    ids=["blob", "indexed-blob"],
+)
+async def test_blob_gc(
+    factory: Callable[[], store.Store], tmp_path: pathlib.Path
+) -> None:
+    db = factory()
+    path = anyio.Path(tmp_path)
+
+    def age(key: str, seconds: float) -> None:
+        meta = pathlib.Path(path, store.BlobStore.METADIR, key)
+        then = meta.stat().st_mtime - seconds
+        os.utime(meta, (then, then))
+
+    for key in ("old", "new"):
+        await db.write(path / key, b"x")
+    age("old", 100)
+    # times are per record though the records share an inode
+    stats = await db.gc(path, max_age=50, evict="ttl")
+    assert stats.names == ["old"]
+    # the blob is still referenced by new
+    assert stats.nbytes == 0
+    await db.write(path / "old", b"x")
+    age("old", 100)
+    age("new", 100)
+    await db.touch(path / "new")
+    assert (await db.gc(path, max_age=50)).names == ["old"]
+    stats = await db.gc(path, max_age=0)
+    assert stats.names == ["new"]
+    assert stats.nbytes == 1
+    assert await db.keys(path) == []
+    # evicted concurrently
+    assert await db._evict(path / "new", 1) == 0
+    assert store.BlobStore._unref(pathlib.Path(path / "blob")) == 0
+    await db.close()
+
+
+async def test_sqlite_layout(tmp_path: pathlib.Path) -> None:
+    db = store.SqliteStore()
+    path = anyio.Path(tmp_path) / "impl"
+    # no database is created by read or delete
+    with pytest.raises(FileNotFoundError):
+        await db.delete(path / "a.msgpack")
+    assert not await path.exists()
+    for key in "ab":
+        await db.write(path / f"{key}.msgpack", key.encode())
+    assert [p.name async for p in path.iterdir() if p.suffix == ".sqlite"] == [
+        db.FILENAME
+    ]
+    await db.close()
+    # reopen
+    assert await db.read(path / "a.msgpack") == b"a"
+    await db.close()
+
+
+async def test_struct_mmap(ctx: Context, tmp_path: pathlib.Path) -> None:
+    with ctx(cachedir=anyio.Path(tmp_path), store=store.FileStore(mmap_threshold=0)):
+        obj = Impl2.factory(path=anyio.Path("."))
+        await obj.put()
+        assert await Impl2.get(str(obj)) == obj
+        await ctx.store.close()
+
+
+async def test_struct(db: store.Store, ctx: Context, tmp_path: pathlib.Path) -> None:
+    with ctx(cachedir=anyio.Path(tmp_path), store=db):
+        obj = Impl.factory()
+        await obj.put()
+        assert await Impl.get(str(obj)) == obj
+        await obj.delete()
+        assert await Impl.get(str(obj)) is None
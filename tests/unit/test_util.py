@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import anyio
 import pytest
 import typeguard
 
@@ -21,6 +22,21 @@ def test_make_sync() -> None:
     assert x.sync() == 1
 
 
+async def test_amap() -> None:
+    running = peak = 0
+
+    async def double(value: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await anyio.sleep(0.01 * (value % 2))
+        running -= 1
+        return value * 2
+
+    assert await util.amap(double, range(5), 2) == [0, 2, 4, 6, 8]
+    assert peak == 2
+
+
 def test_irepr() -> None:
     assert util.irepr({"a", "B"}) == "'B', 'a'"
 
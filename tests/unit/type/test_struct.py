@@ -1,13 +1,37 @@
 from __future__ import annotations
 
-import contextlib
+import io
 import pathlib
 from collections.abc import Generator
 
 import anyio
+import msgpack
+import msgspec
 import pytest
-
-from zerolib import Context, Dic, FrozenStruct, Struct, field, serialize, union
+from anyio.abc import ByteReceiveStream
+
+from zerolib import (
+    CompactStruct,
+    Context,
+    Dic,
+    FrozenStruct,
+    Struct,
+    compress,
+    field,
+    register_ext_type,
+    serialize,
+    store,
+    union,
+    util,
+)
+from zerolib.type.struct import (
+    DECODERS,
+    EXT_TYPES,
+    STREAM_CHOICES,
+    UNION_TYPES,
+    Encoder,
+    StreamType,
+)
 
 
 @union
@@ -25,13 +49,6 @@ class Impl(Struct):
         self._runtime = True
 
 
-@pytest.fixture(autouse=True)
-def _reset_ext_types() -> None:
-    for key in ("_msgpack_ext_types", "json", "msgpack", "yaml"):
-        with contextlib.suppress(AttributeError):
-            delattr(Struct._decoder, key)
-
-
 def test_log(caplog: pytest.LogCaptureFixture) -> None:
     obj = Impl.factory()
     obj.log.info("test")
@@ -106,6 +123,110 @@ def test_serde(fmt: str) -> None:
     assert cls.decode(obj.encode(fmt), fmt) == obj
 
 
+class ChunkStream(ByteReceiveStream):
+    def __init__(self, data: bytes, size: int) -> None:
+        self.data = data
+        self.size = size
+
+    async def receive(self, max_bytes: int = 65536) -> bytes:
+        if not self.data:
+            raise anyio.EndOfStream
+        size = min(max_bytes, self.size)
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+    async def aclose(self) -> None: ...
+
+
+@pytest.mark.parametrize("fmt", STREAM_CHOICES)
+async def test_stream(fmt: StreamType, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("zerolib.type.struct.STREAM_READ_SIZE", 3)
+    objs = [Impl2.factory(str(i), mint=i) for i in range(10)]
+    encoded = b"".join(Impl2.encode_many(objs, fmt))
+    assert list(Impl2.decode_stream(io.BytesIO(encoded), fmt)) == objs
+    assert [
+        obj async for obj in Impl2.decode_stream_async(ChunkStream(encoded, 3), fmt)
+    ] == objs
+    assert list(Impl2.decode_stream(io.BytesIO(), fmt)) == []
+
+
+async def test_stream_json_unterminated() -> None:
+    obj = Impl.factory()
+    encoded = obj.encode("json")
+    assert list(Impl.decode_stream(io.BytesIO(encoded), "json")) == [obj]
+    stream = ChunkStream(encoded, len(encoded))
+    assert [obj async for obj in Impl.decode_stream_async(stream, "json")] == [obj]
+
+
+def test_stream_msgpack() -> None:
+    objs = [Impl.factory(str(i), mint=i) for i in range(3)]
+    encoded = b"".join(Impl.encode_many(objs))
+    assert list(msgpack.Unpacker(io.BytesIO(encoded))) == [  # type: ignore[attr-defined]
+        msgspec.msgpack.decode(obj.encode()) for obj in objs
+    ]
+    assert [
+        item.mstr for item in serialize.iterload(io.BytesIO(encoded), "msgpack")
+    ] == ["0", "1", "2"]
+
+
+async def test_stream_truncated() -> None:
+    record = Impl.factory().encode()
+    encoded = b"".join(Impl.encode_many([Impl.factory()] * 2))
+    for truncated in (encoded[:-1], encoded[: len(record) + 1]):
+        with pytest.raises(anyio.IncompleteRead):
+            list(Impl.decode_stream(io.BytesIO(truncated)))
+        with pytest.raises(anyio.IncompleteRead):
+            [obj async for obj in Impl.decode_stream_async(ChunkStream(truncated, 3))]
+
+
+@pytest.mark.parametrize("fmt", serialize.SERIALIZERS)
+def test_encode_into(fmt: serialize.FormatType) -> None:
+    obj = Impl2.factory(path=anyio.Path("."))
+    buffer = bytearray(b"xx")
+    obj.encode_into(buffer, 1, fmt)
+    assert buffer == b"x" + obj.encode(fmt)
+
+
+@pytest.mark.parametrize("fmt", serialize.SERIALIZERS)
+def test_encode_order(fmt: serialize.FormatType) -> None:
+    # 8 and 16 collide, so iterate in insertion order
+    obj = Impl(mdict=Dic(b=1, a=2), mset={16, 8})
+    other = Impl(mdict=Dic(a=2, b=1), mset={8, 16})
+    assert list(obj.mset) != list(other.mset)
+    assert obj.encode(fmt) == other.encode(fmt)
+
+
+def test_encode_buffer(monkeypatch: pytest.MonkeyPatch) -> None:
+    encoder = Encoder()
+    monkeypatch.setattr(encoder, "BUFFER_MAX", 1 << 10)
+    with encoder.buffer() as buffer, encoder.buffer() as other:
+        assert buffer is not other
+        buffer.extend(bytes(1 << 10))
+    with encoder.buffer() as reused:
+        assert reused is other
+        reused.extend(bytes(1000))
+        # truncated, but still holding its allocation
+        del reused[600:]
+    with encoder.buffer() as buffer:
+        assert buffer is not reused
+
+
+def test_serde_msgpack_ext_decoders(monkeypatch: pytest.MonkeyPatch) -> None:
+    seen = []
+
+    def decode(data: bytes | memoryview) -> anyio.Path:
+        seen.append(type(data))
+        return anyio.Path(str(data, "utf-8"))
+
+    monkeypatch.setitem(DECODERS, anyio.Path, decode)
+    obj = Impl2.factory(path=anyio.Path("."))
+    encoded = obj.encode("msgpack")
+    assert Impl2.decode(encoded) == obj
+    monkeypatch.setattr("zerolib.type.struct.MEMORYVIEW_DECODERS", {anyio.Path})
+    assert Impl2.decode(memoryview(encoded)) == obj
+    assert seen == [bytes, memoryview]
+
+
 class Obj: ...
 
 
@@ -121,14 +242,11 @@ def test_serde_msgpack_ext_encode_notimplemented() -> None:
         obj.encode(fmt)
 
 
-def test_serde_msgpack_ext_decode_notimplemented(
-    monkeypatch: pytest.MonkeyPatch,
-) -> None:
+def test_serde_msgpack_ext_decode_notimplemented() -> None:
     fmt = "msgpack"
-    obj = Impl2.factory(path=anyio.Path("."))
-    encoded = obj.encode(fmt)
-    monkeypatch.setattr("zerolib.type.struct.EXT_TYPES", {})
-    # del Struct._decoder._msgpack_ext_types
+    encoded = msgspec.msgpack.encode(
+        {"type": "Impl2", "path": msgspec.msgpack.Ext(len(EXT_TYPES) + 1, b".")}
+    )
     with pytest.raises(NotImplementedError):
         Impl2.decode(encoded, fmt)
 
@@ -141,6 +259,86 @@ def test_serde_json_dec_hook_notimplemented() -> None:
         Impl.decode(encoded, fmt)
 
 
+@pytest.fixture
+def registries(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
+    monkeypatch.setattr("zerolib.type.struct.EXT_TYPES", dict(EXT_TYPES))
+    monkeypatch.setattr("zerolib.type.struct.UNION_TYPES", set(UNION_TYPES))
+    yield
+    monkeypatch.undo()
+    Struct._decoder.clear()
+
+
+class Name(str):
+    __slots__ = ()
+
+
+@pytest.mark.usefixtures("registries")
+def test_decode_typed() -> None:
+    class Local(Struct):
+        name: Name | None = None
+
+        def __str__(self) -> str:
+            return str(self.name)
+
+    class Sub(Local): ...
+
+    # not in the union
+    obj = Local()
+    assert Local.decode(obj.encode()) == obj
+    with pytest.raises(msgspec.ValidationError):
+        Local.decode(Sub().encode())
+    union(Sub)
+    assert Local.decode(Sub().encode()) == Sub()
+    obj = Local(Name("a"))
+    with pytest.raises(NotImplementedError):
+        obj.encode()
+    register_ext_type(Name)
+    assert Local.decode(obj.encode()) == obj
+
+
+class Compact(CompactStruct):
+    mstr: str = "a"
+    path: anyio.Path | None = None
+
+    def __str__(self) -> str:
+        return self.mstr
+
+
+def _compact_v2() -> type[CompactStruct]:
+    class Compact(CompactStruct):
+        mint: int = 0
+        mstr: str = "a"
+
+        def __str__(self) -> str:
+            return self.mstr
+
+    return Compact
+
+
+@pytest.mark.parametrize("fmt", serialize.SERIALIZE)
+def test_compact(fmt: serialize.FormatType) -> None:
+    obj = Compact.factory(path=anyio.Path(".")) if fmt == "msgpack" else Compact()
+    encoded = obj.encode(fmt)
+    assert b"mstr" not in encoded
+    assert Compact.decode(encoded, fmt) == obj
+    assert Compact.expand(encoded, fmt) == Dic(
+        type=f"Compact:{Compact.__schema__}", mstr="a", path=obj.path
+    )
+
+
+def test_compact_schema() -> None:
+    v2 = _compact_v2()
+    assert v2.__schema__ != Compact.__schema__
+    assert _compact_v2().__schema__ == v2.__schema__
+    encoded = Compact().encode()
+    with pytest.raises(msgspec.ValidationError):
+        v2.decode(encoded)
+    with pytest.raises(ValueError, match="schema"):
+        v2.expand(encoded)
+    with pytest.raises(TypeError):
+        union(Compact)
+
+
 @pytest.fixture
 def ctx(ctx: Context, tmp_path: pathlib.Path) -> Generator[Context, None, None]:
     with ctx(cachedir=anyio.Path(tmp_path)):
@@ -184,6 +382,115 @@ async def test_store_path_nocache(ctx: Context) -> None:
         assert await Impl.get(path) is None
 
 
+@pytest.mark.usefixtures("ctx")
+async def test_store_keys() -> None:
+    assert await Impl.keys() == []
+    obj = Impl.factory()
+    assert not await Impl.exists(obj)
+    await obj.put()
+    assert await Impl.exists(obj)
+    assert await Impl.exists("a")
+    assert await Impl.exists(Impl.db_path("a"))
+    assert await Impl.keys() == ["a"]
+
+
+@pytest.mark.usefixtures("ctx")
+async def test_store_many() -> None:
+    objs = [Impl.factory(f"k{i}") for i in range(5)]
+    await Impl.put_many(objs, limit=2)
+    keys: list[str | Impl] = ["miss", *reversed(objs), "k0"]
+    assert await Impl.get_many(keys) == [None, *reversed(objs), objs[0]]
+    assert await Impl.get_many(["miss"], default=False) == [False]
+    assert await Impl.get_many([]) == []
+
+
+async def test_store_memcache(ctx: Context) -> None:
+    obj = Impl.factory()
+    path = Impl.db_path(obj)
+    await obj.put()
+    assert path not in ctx.lru
+    with ctx(memcache=True):
+        got = await Impl.get(obj)
+        assert got == obj
+        assert path in ctx.lru
+        # instances are decoded per get so mutation does not leak into the cache
+        got.mdict.a = 1
+        cached = await Impl.get(obj)
+        assert cached == obj
+        assert cached is not got
+        assert cached._runtime
+        await obj.put()
+        obj.mset.add(1)
+        assert await Impl.get(obj) == Impl.factory()
+        await obj.delete()
+        assert path not in ctx.lru
+        assert await Impl.get(obj) is None
+    await obj.put()
+    assert path not in ctx.lru
+
+
+async def test_store_memcache_touch(ctx: Context) -> None:
+    obj = Impl.factory()
+    await obj.put()
+
+    async def atime() -> float:
+        stats: list[store.RecordStat] = await ctx.store.stat(Impl.db_dir())
+        return stats[0].atime
+
+    with ctx(memcache=True), util.patch(Impl, "db_max_age", 60):
+        await Impl.get(obj)
+        accessed, hits = await atime(), ctx.lru.hits
+        await anyio.sleep(0.01)
+        await Impl.get(obj)
+        assert ctx.lru.hits == hits + 1
+        assert await atime() > accessed
+
+
+async def test_store_gc(ctx: Context) -> None:
+    objs = [Impl.factory(f"k{i}") for i in range(3)]
+    for obj in objs:
+        await obj.put()
+        await anyio.sleep(0.01)
+    assert not (await Impl.gc()).entries
+    with util.patch(Impl, "db_max_bytes", 2 * len(objs[0].encode())):
+        with ctx(memcache=True):
+            # k0 is most recently accessed, and cached in memory
+            assert await Impl.get(objs[0]) == objs[0]
+        assert (await Impl.gc()).names == ["k1.msgpack"]
+        assert await Impl.keys() == ["k0", "k2"]
+        with util.patch(Impl, "db_max_age", 0):
+            with anyio.move_on_after(0.1):
+                await Impl.gc_forever(1)
+            assert await Impl.keys() == []
+            assert Impl.db_path(objs[0]) not in ctx.lru
+
+
+async def test_store_compression(ctx: Context) -> None:
+    obj = Impl.factory("a" * 100)
+    await obj.put()
+    plain = await ctx.store.read(Impl.db_path(obj))
+    with ctx(compression=compress.Compression()):
+        await obj.put()
+        compressed = await ctx.store.read(Impl.db_path(obj))
+        assert len(compressed) < len(plain)
+        assert await Impl.get(obj) == obj
+    # mixed: compressed record read with compression off
+    assert await Impl.get(obj) == obj
+    with util.patch(Impl, "db_compression", compress.Compression("lzma")):
+        await obj.put()
+        assert (await ctx.store.read(Impl.db_path(obj)))[1] == compress.CODECS["lzma"]
+        assert await Impl.get(obj) == obj
+
+
+async def test_store_compact(ctx: Context) -> None:
+    obj = Compact()
+    await obj.put()
+    assert await Compact.get(obj) == obj
+    # record written by the previous layout is discarded
+    assert await _compact_v2().get(str(obj)) is None
+    assert not await ctx.store.exists(Compact.db_path(obj))
+
+
 async def test_get_exc(
     ctx: Context, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
 ) -> None: